@@ -1,6 +1,7 @@
 import streamlit as st
-import json
 import os
+
+from ecoverse import db, metrics
 os.makedirs("data", exist_ok=True)
 # ===============================
 # GLOBAL SESSION STATE INIT
@@ -41,6 +42,7 @@ st.set_page_config(
     page_icon="🌱",
     layout="wide"
 )
+metrics.page_view("Home", st.session_state)
 
 # ===============================
 # SESSION STATE INITIALIZATION
@@ -178,13 +180,7 @@ if st.session_state.DEMO_MODE:
     st.sidebar.subheader("🧪 Demo Controls")
 
     if st.sidebar.button("🔄 Reset Demo Data"):
-        os.makedirs("data", exist_ok=True)
-
-        with open("data/users.json","w") as f:
-            json.dump({"demo_user":{"name":"Demo User","points":0}},f,indent=2)
-
-        with open("data/transactions.json","w") as f:
-            json.dump([],f,indent=2)
+        db.reset_demo_data(db.get_conn())
 
         st.sidebar.success("✅ Demo data reset")
         st.rerun()
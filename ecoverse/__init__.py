@@ -0,0 +1 @@
+"""Shared data and analytics helpers for the EcoVerse AI pages."""
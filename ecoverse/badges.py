@@ -0,0 +1,114 @@
+import bisect
+import os
+import sys
+import threading
+
+from ecoverse.jsonio import load_json
+
+# ===============================
+# BADGE RULES
+# ===============================
+# Every badge is declared once in RULES_PATH as a threshold on a metric:
+#     {"points": [{"badge": "...", "threshold": 100}, ...], "streak": [...]}
+# The rules are loaded once per process and kept as sorted thresholds per
+# metric, so the badges crossed by a change from `old` to `new` are one
+# bisect slice. They are evaluated only when the metric moves (ledger
+# catch-up for points, streak updates for streaks) and awarded into the
+# badges table; pages just read what was awarded.
+#
+# recompute() re-evaluates every user with one INSERT ... SELECT per rule,
+# for rule changes and databases that predate the rules.
+
+RULES_PATH = os.environ.get("ECOVERSE_BADGE_RULES", "data/badge_rules.json")
+
+# Current value of each metric per user, for the batch recompute
+METRIC_SQL = {
+    "points": "SELECT id AS user, points AS value FROM users",
+    "streak": "SELECT user, CAST(julianday(last_date) - julianday(start_date) "
+              "AS INTEGER) + 1 AS value FROM streaks",
+}
+
+
+class Rules:
+    def __init__(self, config):
+        self.metrics = {}
+        for metric, rules in config.items():
+            if metric not in METRIC_SQL:
+                raise ValueError(f"unknown badge metric: {metric}")
+            ordered = sorted(rules, key=lambda r: r["threshold"])
+            self.metrics[metric] = (
+                [r["threshold"] for r in ordered],
+                [r["badge"] for r in ordered],
+            )
+
+    def rules(self, metric):
+        """[(badge, threshold)] for one metric, lowest threshold first."""
+        thresholds, names = self.metrics.get(metric, ([], []))
+        return list(zip(names, thresholds))
+
+    def crossed(self, metric, old, new):
+        """Badges whose threshold lies in (old, new]."""
+        thresholds, names = self.metrics.get(metric, ([], []))
+        return names[bisect.bisect_right(thresholds, old):bisect.bisect_right(thresholds, new)]
+
+
+_rules = None
+_lock = threading.Lock()
+
+
+def get_rules():
+    global _rules
+    if _rules is None:
+        with _lock:
+            if _rules is None:
+                _rules = Rules(load_json(RULES_PATH, {}))
+    return _rules
+
+
+def _award(conn, user_id, names):
+    conn.executemany(
+        "INSERT OR IGNORE INTO badges (user, badge) VALUES (?, ?)",
+        [(user_id, name) for name in names],
+    )
+
+
+def on_change(conn, metric, user_id, old, new):
+    """Award the badges crossed by a metric moving from old to new."""
+    if new > old:
+        _award(conn, user_id, get_rules().crossed(metric, old, new))
+
+
+def on_points(conn, changes):
+    """changes: [(user, old_points, new_points)] from a ledger catch-up."""
+    rules = get_rules()
+    rows = [(user, name)
+            for user, old, new in changes if new > old
+            for name in rules.crossed("points", old, new)]
+    conn.executemany("INSERT OR IGNORE INTO badges (user, badge) VALUES (?, ?)", rows)
+
+
+def recompute(conn):
+    """Award every badge each user currently qualifies for. Returns new awards."""
+    before = conn.total_changes
+    rules = get_rules()
+    for metric, sql in METRIC_SQL.items():
+        for badge, threshold in rules.rules(metric):
+            conn.execute(
+                "INSERT OR IGNORE INTO badges (user, badge) "
+                f"SELECT user, ? FROM ({sql}) WHERE value >= ?",
+                (badge, threshold),
+            )
+    return conn.total_changes - before
+
+
+if __name__ == "__main__":
+    # python -m ecoverse.badges recompute
+    if len(sys.argv) < 2 or sys.argv[1] != "recompute":
+        print("usage: python -m ecoverse.badges recompute")
+        sys.exit(1)
+
+    from ecoverse import db
+
+    conn = db.get_conn()
+    with db.transaction(conn):
+        print(f"awarded {recompute(conn)} badges")
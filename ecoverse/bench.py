@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from ecoverse import (
+    db, dedupe, emissions, forecast, leaderboard, ledger, rewards, rollups,
+    streaks, synthetic,
+)
+
+# ===============================
+# DATA-PATH BENCHMARKS
+# ===============================
+# For each dataset scale (a fraction of synthetic.FULL), generate a
+# database once under BENCH_DIR, then time what each page does with it:
+# the same db / rollups / forecast calls and pandas chart prep the page
+# makes, reported per section as the median of REPEAT runs in ms. Writes
+# run inside a transaction that is rolled back, so the dataset stays
+# fixed between runs. Each page is also rendered headlessly with
+# Streamlit's AppTest in a child process pointed at the dataset.
+#
+# Results are compared against the baseline committed at bench/baseline.json:
+# a section is a regression when it is more than TOLERANCE slower and at
+# least MIN_DELTA_MS slower. `--update` stores the current run there;
+# commit it alongside the change that moved the numbers.
+#
+#     python -m ecoverse.bench [--scales 0.01,0.1,1] [--update] [--no-render]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(db.DATA_DIR, "bench")  # generated datasets (not tracked)
+BASELINE_PATH = os.path.join(REPO_ROOT, "bench", "baseline.json")  # tracked
+SCALES = [0.01, 0.1]
+REPEAT = 5
+TOLERANCE = 0.25
+MIN_DELTA_MS = 2.0
+
+PAGES = [
+    "app.py",
+    "pages/1_User_Dashboard.py",
+    "pages/2_Carbon_Tracker.py",
+    "pages/3_Rewards.py",
+    "pages/4_Admin_Dashboard.py",
+]
+
+
+def _ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _rolled_back(conn, fn):
+    def run():
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fn()
+        finally:
+            conn.execute("ROLLBACK")
+    return run
+
+
+def dataset(scale):
+    """Path of the generated database for `scale`, creating it if needed."""
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"ecoverse-{scale:g}.db")
+    if not os.path.exists(path):
+        print(f"generating {path} ...", flush=True)
+        synthetic.generate(path, **_sizes(scale))
+    return path
+
+
+def _sizes(scale):
+    sizes = synthetic.scaled(scale)
+    sizes["n_rewards"] = sizes.pop("rewards")
+    return sizes
+
+
+def busiest_user(conn):
+    return conn.execute(
+        "SELECT user FROM transactions GROUP BY user ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()[0]
+
+
+# ===============================
+# PER-PAGE DATA PATHS
+# ===============================
+def bench_app(conn, path, user, repeat):
+    # What get_conn costs a rerun once the process has run db.setup()
+    def open_db():
+        db.connect(path).close()
+    return {"load": _ms(open_db, repeat)}
+
+
+def bench_user_dashboard(conn, path, user, repeat):
+    sha = uuid.uuid4().hex
+
+    def chart_prep():
+        df = pd.DataFrame(db.user_transactions(conn, user))
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df = df.sort_values("timestamp")
+        df["cumulative_points"] = df["points"].cumsum()
+
+    def save():
+        if db.claim(conn, f"waste_upload:{sha}") and \
+                dedupe.record(conn, sha, 0x0F0F_F0F0_1234_5678, 0x4A7A3C, user,
+                              "Organic Waste", 0.9):
+            txn_id = db.insert_transaction(conn, {
+                "user": user, "type": "waste_upload", "category": "Organic Waste",
+                "points": 5, "timestamp": datetime.now().isoformat(),
+            })
+            ledger.credit(conn, user, 5, txn_id)
+
+    return {
+        "load": _ms(lambda: (db.get_user(conn, user),
+                             db.user_transactions(conn, user)), repeat),
+        "dedupe": _ms(lambda: dedupe.find_similar(
+            conn, 0x0F0F_F0F0_1234_5678, 0x4A7A3C), repeat),
+        "chart_prep": _ms(chart_prep, repeat),
+        "save": _ms(_rolled_back(conn, save), repeat),
+    }
+
+
+def bench_carbon_tracker(conn, path, user, repeat):
+    records = db.user_carbon_records(conn, user)
+
+    def chart_prep():
+        df = pd.DataFrame(records)
+        df["date"] = pd.to_datetime(df["date"])
+        df.set_index("date")["co2"]
+
+    def save():
+        result = emissions.compute_one("Bus", 12.0, 3.0, 0.3)
+        now = datetime.now()
+        db.insert_carbon_record(conn, {
+            "user": user, "date": now.date().isoformat(), "timestamp": now.isoformat(),
+            "travel_mode": "Bus", "co2": result["co2"],
+        })
+        streaks.record_activity(conn, user, now.date())
+        txn_id = db.insert_transaction(conn, {
+            "user": user, "type": "carbon_entry", "co2": result["co2"],
+            "points": result["points"], "timestamp": now.isoformat(),
+        })
+        ledger.credit(conn, user, result["points"], txn_id)
+
+    return {
+        "load": _ms(lambda: db.user_carbon_records(conn, user), repeat),
+        "streaks": _ms(lambda: (streaks.current(conn, user),
+                                db.user_badges(conn, user)), repeat),
+        "chart_prep": _ms(chart_prep, repeat),
+        "forecast": _ms(lambda: forecast.forecast(records), repeat),
+        "save": _ms(_rolled_back(conn, save), repeat),
+    }
+
+
+def bench_rewards(conn, path, user, repeat):
+    leaderboard.get(conn)  # built once per process, then refreshed
+    catalog = rewards.catalog(conn)
+    cheapest = catalog[0]
+
+    def save():
+        rewards.redeem(conn, user, cheapest, uuid.uuid4().hex, datetime.now().isoformat())
+
+    return {
+        "load": _ms(lambda: (rewards.catalog(conn), rewards.stock(conn),
+                             db.get_user(conn, user)), repeat),
+        "aggregate": _ms(lambda: leaderboard.rank(conn, user), repeat),
+        "filter": _ms(lambda: db.user_transactions(conn, user, "redemption"), repeat),
+        "save": _ms(_rolled_back(conn, save), repeat),
+    }
+
+
+def bench_admin(conn, path, user, repeat):
+    leaderboard.get(conn)
+    since = (date.today() - timedelta(days=forecast.WINDOW)).isoformat()
+    pending = [t["id"] for t in db.pending_queue(conn, limit=100)]
+
+    def aggregate():
+        board = leaderboard.get(conn)
+        board.top(20)
+        board.top(25, 25)
+        db.total_points(conn)
+        db.count_transactions(conn)
+        rollups.daily_counts(conn)
+        rollups.status_counts(conn)
+
+    return {
+        "aggregate": _ms(aggregate, repeat),
+        "forecast": _ms(lambda: forecast.forecast_all(
+            db.carbon_records_since(conn, since)), repeat),
+        "outlook": _ms(lambda: forecast.campus_outlook(conn), repeat),
+        "filter": _ms(lambda: (db.pending_queue(conn, limit=100),
+                               db.transaction_page(conn, limit=50)), repeat),
+        "save": _ms(_rolled_back(conn, lambda: rewards.review(
+            conn, pending, approve=False)), repeat),
+    }
+
+
+DATA_PATHS = {
+    "app.py": bench_app,
+    "pages/1_User_Dashboard.py": bench_user_dashboard,
+    "pages/2_Carbon_Tracker.py": bench_carbon_tracker,
+    "pages/3_Rewards.py": bench_rewards,
+    "pages/4_Admin_Dashboard.py": bench_admin,
+}
+
+
+# ===============================
+# HEADLESS RENDERS
+# ===============================
+def render_child(page, user, repeat):
+    """Runs in the child process: render `page` `repeat` times, print ms."""
+    from streamlit.testing.v1 import AppTest
+
+    times = []
+    for _ in range(repeat):
+        at = AppTest.from_file(os.path.join(REPO_ROOT, page), default_timeout=120)
+        at.secrets["OPENAI_API_KEY"] = "bench"
+        at.session_state["logged_in"] = True
+        at.session_state["role"] = "admin"
+        at.session_state["user"] = user
+        started = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].value}")
+    print(json.dumps({"render": round(statistics.median(times), 3)}))
+
+
+def render(page, path, user, repeat):
+    env = dict(
+        os.environ,
+        ECOVERSE_DB=os.path.abspath(path),
+        # No network in benchmarks: the AI assistant fails fast instead
+        OPENAI_API_BASE="http://127.0.0.1:9",
+    )
+    out = subprocess.run(
+        [sys.executable, "-m", "ecoverse.bench", "render", page, user, str(repeat)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ===============================
+# SUITE
+# ===============================
+def run(scales=SCALES, repeat=REPEAT, with_render=True):
+    """{scale: {page: {section: median ms}}}"""
+    results = {}
+    for scale in scales:
+        path = dataset(scale)
+        conn = db.connect(path)
+        user = busiest_user(conn)
+        results[f"{scale:g}"] = page_results = {}
+        for page in PAGES:
+            timings = DATA_PATHS[page](conn, path, user, repeat)
+            if with_render:
+                timings.update(render(page, path, user, repeat))
+            page_results[page] = timings
+            print(f"[{scale:g}] {page}: " +
+                  ", ".join(f"{k}={v:.1f}ms" for k, v in timings.items()), flush=True)
+        conn.close()
+        leaderboard.invalidate()
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta_ms=MIN_DELTA_MS):
+    """[(scale, page, section, baseline ms, current ms)] for each regression."""
+    regressions = []
+    for scale, pages in results.items():
+        for page, sections in pages.items():
+            for section, ms in sections.items():
+                before = baseline.get(scale, {}).get(page, {}).get(section)
+                if before is None:
+                    continue
+                if ms > before * (1 + tolerance) and ms - before >= min_delta_ms:
+                    regressions.append((scale, page, section, before, ms))
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline.update(results)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "render":
+        # internal: python -m ecoverse.bench render <page> <user> <repeat>
+        render_child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(
+        prog="python -m ecoverse.bench",
+        description="Benchmark each page's data path against a stored baseline.",
+    )
+    parser.add_argument("--scales", default=",".join(f"{s:g}" for s in SCALES),
+                        help="comma-separated fractions of the full dataset "
+                             f"({synthetic.FULL['users']:,} users, "
+                             f"{synthetic.FULL['transactions']:,} transactions)")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--no-render", action="store_true",
+                        help="skip the headless AppTest renders")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true",
+                        help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    results = run([float(s) for s in args.scales.split(",")], args.repeat,
+                  with_render=not args.no_render)
+
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"no baseline at {args.baseline}; run with --update to create one")
+        sys.exit(0)
+
+    regressions = compare(results, baseline)
+    for scale, page, section, before, ms in regressions:
+        print(f"REGRESSION [{scale}] {page} {section}: {before:.1f}ms -> {ms:.1f}ms")
+    if not regressions:
+        print("no regressions against baseline")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ecoverse import db, emissions, ledger, streaks
+
+# ===============================
+# BULK ACTIVITY IMPORT
+# ===============================
+# Streams a CSV or JSONL activity export in fixed-size chunks, so memory
+# stays bounded by CHUNK_ROWS whatever the file size. Each chunk is
+# validated column-wise, run through the emissions engine in one pass and
+# committed with one write transaction (carbon records, transactions and
+# ledger credits together).
+#
+# Every row is keyed by the file's SHA-256 and its row number
+# (import:<sha>:<row>), claimed in the same transaction, so importing a
+# file again, or resuming one that failed part-way, skips the rows
+# already written instead of crediting them twice.
+#
+# Columns: user, date (required); travel_mode, km, electricity, lifestyle
+# (optional, default Walk / 0 / 0 / 0). A row must measure something (km
+# or electricity): an empty one would score as zero emissions and earn
+# the maximum points.
+
+CHUNK_ROWS = 50_000
+MAX_REJECTS = 1000  # rejected rows kept for the report; all are counted
+
+DEFAULTS = {"travel_mode": "Walk", "km": 0.0, "electricity": 0.0, "lifestyle": 0.0}
+NUMERIC = ("km", "electricity", "lifestyle")
+MEASURED = ("km", "electricity")
+
+
+def read_chunks(source, fmt=None, chunk_rows=CHUNK_ROWS):
+    """
+    Yield DataFrames of at most chunk_rows string-typed rows. `source`
+    is a path or a file object; fmt ("csv" / "jsonl") defaults to the
+    file extension.
+    """
+    if fmt is None:
+        name = source if isinstance(source, str) else getattr(source, "name", "")
+        fmt = "jsonl" if name.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+    if fmt == "csv":
+        reader = pd.read_csv(
+            source, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+            skipinitialspace=True,
+        )
+    elif fmt == "jsonl":
+        reader = pd.read_json(source, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        raise ValueError(f"unsupported format: {fmt!r}")
+
+    with reader:
+        yield from reader
+
+
+def parse_dates(values):
+    """
+    Parse ISO 8601 dates to naive local wall time: a UTC offset is
+    dropped, not applied, so an activity keeps the day it was logged on.
+    Unparsable values become NaT.
+    """
+    values = values.astype(str)
+    try:
+        return _wall_time(pd.to_datetime(values, format="ISO8601", errors="coerce"))
+    except ValueError:
+        pass
+
+    # Mixed offsets (an export crossing DST) or aware and naive stamps
+    # together cannot share a dtype: parse the rows of each offset apart
+    offsets = values.str.extract(r"(Z|[+-]\d\d:?\d\d)$", expand=False).fillna("")
+    parts = []
+    for _, group in values.groupby(offsets, sort=False):
+        try:
+            parts.append(_wall_time(pd.to_datetime(group, format="ISO8601", errors="coerce")))
+        except ValueError:
+            parts.append(pd.to_datetime(group.map(_parse_date)))
+    return pd.concat(parts).reindex(values.index)
+
+
+def _wall_time(when):
+    return when.dt.tz_localize(None) if when.dt.tz is not None else when
+
+
+def _parse_date(value):
+    try:
+        when = pd.to_datetime(value, format="ISO8601")
+    except (ValueError, OverflowError):
+        return pd.NaT
+    return when.tz_localize(None) if when.tzinfo is not None else when
+
+
+def validate(chunk):
+    """
+    Split a raw chunk into (activities, rejects). activities has typed
+    columns ready for emissions.compute; rejects is a list of
+    (row_number, reason) with 1-based data row numbers.
+    """
+    n = len(chunk)
+    reason = np.full(n, None, dtype=object)
+
+    def reject(mask, why):
+        mask = np.asarray(mask) & pd.isna(reason)
+        reason[mask] = why
+
+    if "user" not in chunk or "date" not in chunk:
+        reason[:] = "missing user/date columns"
+        return chunk.iloc[0:0], list(zip(chunk.index + 1, reason))
+
+    user = chunk["user"].astype(str).str.strip()
+    reject(user.isin(["", "nan", "None"]), "missing user")
+
+    when = parse_dates(chunk["date"])
+    reject(when.isna(), "invalid date")
+
+    activities = pd.DataFrame({"user": user, "date": when})
+    measured = np.zeros(n, dtype=bool)
+
+    for col in ("travel_mode",) + NUMERIC:
+        if col in chunk:
+            raw = chunk[col].where(chunk[col].astype(str).str.strip() != "")
+        else:
+            raw = pd.Series(None, index=chunk.index, dtype=object)
+        if col == "travel_mode":
+            activities[col] = raw.fillna(DEFAULTS[col]).astype(str).str.strip()
+            reject(emissions.travel_mode_codes(activities[col]) < 0, "unknown travel_mode")
+        else:
+            values = pd.to_numeric(raw, errors="coerce")
+            reject(raw.notna() & values.isna(), f"invalid {col}")
+            if col in MEASURED:
+                measured |= values.notna().to_numpy()
+            activities[col] = values.fillna(DEFAULTS[col])
+            reject(activities[col] < 0, f"negative {col}")
+
+    reject(activities["lifestyle"] > 1, "lifestyle must be between 0 and 1")
+    reject(~measured, "no activity (km or electricity)")
+
+    bad = ~pd.isna(reason)
+    rejects = list(zip((chunk.index[bad] + 1).tolist(), reason[bad].tolist()))
+    return activities[~bad], rejects
+
+
+def file_digest(source):
+    """SHA-256 of a path or binary file object (left at its position)."""
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        pos = source.tell()
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+        source.seek(pos)
+    return digest.hexdigest()
+
+
+def row_keys(source_key, activities):
+    """Sorted idempotency keys for a chunk, from its 1-based row numbers."""
+    return [f"import:{source_key}:{row:010d}" for row in (activities.index + 1).tolist()]
+
+
+def write_chunk(conn, activities, source_key=None):
+    """
+    Compute emissions for a validated chunk and commit it in one
+    transaction. With `source_key` (the file digest), rows whose key was
+    already claimed are skipped. Returns the number of rows written.
+    """
+    if activities.empty:
+        return 0
+
+    with db.transaction(conn):
+        if source_key is not None:
+            fresh = db.claim_batch(conn, row_keys(source_key, activities))
+            activities = activities[fresh]
+        if not activities.empty:
+            _write(conn, activities)
+    return len(activities)
+
+
+def _write(conn, activities):
+    result = emissions.compute(activities)
+    dates = activities["date"].dt.strftime("%Y-%m-%d").tolist()
+    stamps = activities["date"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    users = activities["user"].tolist()
+    modes = activities["travel_mode"].tolist()
+    co2 = result["co2"].tolist()
+    points = result["points"].tolist()
+
+    db.insert_carbon_records(conn, (
+        {"user": u, "date": d, "timestamp": ts, "travel_mode": m, "co2": c}
+        for u, d, ts, m, c in zip(users, dates, stamps, modes, co2)
+    ))
+    txn_ids = db.insert_transactions(conn, (
+        {"user": u, "type": "carbon_entry", "co2": c, "points": p, "timestamp": ts}
+        for u, ts, c, p in zip(users, stamps, co2, points)
+    ))
+    ledger.post_many(conn, (
+        (u, "credit", p, t) for u, p, t in zip(users, points, txn_ids)
+    ))
+    for user_id in set(users):
+        streaks.refresh(conn, user_id)
+
+
+def import_activities(conn, source, fmt=None, chunk_rows=CHUNK_ROWS, on_chunk=None):
+    """
+    Import a whole file. on_chunk(report) is called after each committed
+    chunk. Returns a report dict: rows, imported, duplicates (rows an
+    earlier import of the same file already wrote), rejected, rejects
+    (first MAX_REJECTS as (row, reason)), seconds, rows_per_second.
+    """
+    report = {"rows": 0, "imported": 0, "duplicates": 0, "rejected": 0, "rejects": []}
+    started = time.perf_counter()
+    source_key = file_digest(source)
+
+    for chunk in read_chunks(source, fmt, chunk_rows):
+        chunk.index = pd.RangeIndex(report["rows"], report["rows"] + len(chunk))
+        activities, rejects = validate(chunk)
+
+        written = write_chunk(conn, activities, source_key)
+        report["imported"] += written
+        report["duplicates"] += len(activities) - written
+        report["rows"] += len(chunk)
+        report["rejected"] += len(rejects)
+        room = MAX_REJECTS - len(report["rejects"])
+        report["rejects"].extend(rejects[:max(room, 0)])
+
+        report["seconds"] = time.perf_counter() - started
+        report["rows_per_second"] = report["rows"] / max(report["seconds"], 1e-9)
+        if on_chunk is not None:
+            on_chunk(report)
+
+    report["seconds"] = time.perf_counter() - started
+    report["rows_per_second"] = report["rows"] / max(report["seconds"], 1e-9)
+    return report
+
+
+# ===============================
+# CLI
+# ===============================
+if __name__ == "__main__":
+    # python -m ecoverse.bulk_import <file.csv|file.jsonl> [chunk_rows]
+    if len(sys.argv) < 2:
+        print("usage: python -m ecoverse.bulk_import <file.csv|file.jsonl> [chunk_rows]")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    if not os.path.exists(path):
+        print(f"{path}: no such file")
+        sys.exit(1)
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNK_ROWS
+
+    def progress(report):
+        print(f"{report['rows']} rows ({report['rows_per_second']:.0f} rows/s)", file=sys.stderr)
+
+    report = import_activities(db.get_conn(), path, chunk_rows=chunk_rows, on_chunk=progress)
+    print(f"imported:   {report['imported']}")
+    print(f"duplicates: {report['duplicates']}")
+    print(f"rejected:   {report['rejected']}")
+    print(f"rows/s:     {report['rows_per_second']:.0f}")
+    for row, why in report["rejects"]:
+        print(f"  row {row}: {why}")
@@ -0,0 +1,237 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from ecoverse.db import DATA_DIR
+from ecoverse.images import ingest
+
+# ===============================
+# WASTE IMAGE CLASSIFIER
+# ===============================
+# CPU-only, no network: each image is reduced to a small colour/texture
+# feature vector (hue histogram of the saturated pixels, grey / dark /
+# bright fractions, saturation, contrast and edge density) and scored by
+# a nearest-centroid linear model,
+#     logits = x @ W.T + b,  W = mu / T,  b = -|mu|^2 / (2T)
+# on standardized features. Without a trained model file the centroids
+# are hand-set prototypes for each category; `python -m
+# ecoverse.classifier fit <dir>` fits real centroids from a folder of
+# labelled images (one sub-folder per category) into MODEL_PATH.
+#
+# The model is loaded once per process and shared by every session.
+
+CATEGORIES = [
+    "Recyclable (Plastic)",
+    "Recyclable (Paper)",
+    "Organic Waste",
+    "E-Waste",
+    "Landfill Waste",
+]
+
+MODEL_PATH = os.environ.get("ECOVERSE_CLASSIFIER", f"{DATA_DIR}/waste_classifier.npz")
+FEATURE_SIZE = 96
+HUE_BINS = 12
+TEMPERATURE = 8.0
+
+FEATURES = [f"hue_{i}" for i in range(HUE_BINS)] + [
+    "grey", "dark", "bright", "saturation", "contrast", "edges",
+]
+
+# Rough per-feature spread, used to standardize the built-in prototypes
+_SCALE = np.array([0.08] * HUE_BINS + [0.25, 0.2, 0.2, 0.15, 0.08, 0.06])
+
+# Built-in centroids: a neutral baseline plus each category's signature
+_BASE = dict({f"hue_{i}": 0.03 for i in range(HUE_BINS)},
+             grey=0.4, dark=0.15, bright=0.15, saturation=0.3, contrast=0.2, edges=0.08)
+_PROTOTYPES = {
+    # saturated, vivid hues (bottles, wrappers), specular highlights
+    "Recyclable (Plastic)": dict(hue_7=0.12, hue_8=0.12, hue_0=0.06, grey=0.3,
+                                 bright=0.3, saturation=0.55, contrast=0.22, edges=0.07),
+    # white / beige, unsaturated and bright, smooth
+    "Recyclable (Paper)": dict(hue_1=0.06, grey=0.75, dark=0.05, bright=0.45,
+                               saturation=0.12, contrast=0.14, edges=0.05),
+    # greens and browns with strong texture
+    "Organic Waste": dict(hue_1=0.12, hue_2=0.1, hue_3=0.14, hue_4=0.12, grey=0.25,
+                          dark=0.2, bright=0.08, saturation=0.45, contrast=0.2, edges=0.14),
+    # dark casings, grey metal, PCB green, many sharp edges
+    "E-Waste": dict(hue_4=0.06, hue_5=0.05, grey=0.75, dark=0.45, bright=0.1,
+                    saturation=0.2, contrast=0.28, edges=0.16),
+    # mixed, dull, cluttered
+    "Landfill Waste": dict(grey=0.5, dark=0.3, bright=0.1, saturation=0.25,
+                           contrast=0.24, edges=0.12),
+}
+
+
+# ===============================
+# FEATURES
+# ===============================
+def features(img):
+    """Feature vector (len(FEATURES),) for one PIL image."""
+    small = img.convert("RGB").resize((FEATURE_SIZE, FEATURE_SIZE), Image.BILINEAR)
+    hsv = np.asarray(small.convert("HSV"), dtype=np.float32) / 255.0
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    n = h.size
+
+    colourful = (s > 0.25) & (v > 0.2)
+    hue_hist = np.bincount(
+        np.minimum((h[colourful] * HUE_BINS).astype(np.int64), HUE_BINS - 1),
+        minlength=HUE_BINS,
+    ) / n
+
+    gx = np.abs(np.diff(v, axis=1)).mean()
+    gy = np.abs(np.diff(v, axis=0)).mean()
+
+    return np.concatenate([hue_hist, [
+        1.0 - colourful.mean(),
+        (v < 0.25).mean(),
+        (v > 0.8).mean(),
+        s.mean(),
+        v.std(),
+        (gx + gy) / 2,
+    ]]).astype(np.float32)
+
+
+# ===============================
+# MODEL
+# ===============================
+class LinearModel:
+    def __init__(self, centroids, scale, categories=CATEGORIES, temperature=TEMPERATURE):
+        self.categories = list(categories)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        mu = self.centroids / self.scale
+        self.W = mu / temperature
+        self.b = -(mu * mu).sum(axis=1) / (2 * temperature)
+
+    @classmethod
+    def builtin(cls):
+        centroids = [
+            [dict(_BASE, **_PROTOTYPES[c])[f] for f in FEATURES] for c in CATEGORIES
+        ]
+        return cls(centroids, _SCALE)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        return cls(data["centroids"], data["scale"], [str(c) for c in data["categories"]])
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, scale=self.scale,
+                 categories=np.array(self.categories))
+
+    def predict_proba(self, X):
+        logits = (X / self.scale) @ self.W.T + self.b
+        logits -= logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        return p / p.sum(axis=1, keepdims=True)
+
+
+_model = None
+_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                if os.path.exists(MODEL_PATH):
+                    _model = LinearModel.load(MODEL_PATH)
+                else:
+                    _model = LinearModel.builtin()
+    return _model
+
+
+def classify(images):
+    """
+    Classify a batch of PIL images. Returns one dict per image:
+    category, confidence, scores ({category: probability}) and
+    latency_ms (its feature extraction plus its share of the batch scoring).
+    """
+    if not images:
+        return []
+    model = get_model()
+
+    feats, extract_ms = [], []
+    for img in images:
+        t = time.perf_counter()
+        feats.append(features(img))
+        extract_ms.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    proba = model.predict_proba(np.stack(feats))
+    score_ms = (time.perf_counter() - t) * 1000 / len(images)
+
+    results = []
+    for p, ms in zip(proba, extract_ms):
+        best = int(p.argmax())
+        results.append({
+            "category": model.categories[best],
+            "confidence": float(p[best]),
+            "scores": dict(zip(model.categories, p.round(4).tolist())),
+            "latency_ms": ms + score_ms,
+        })
+    return results
+
+
+def classify_one(img):
+    return classify([img])[0]
+
+
+# ===============================
+# CLI
+# ===============================
+def fit(image_dir, path=MODEL_PATH):
+    """
+    Fit centroids from image_dir/<category>/*.jpg|png and save them.
+    Categories are the sub-folder names, which should match CATEGORIES
+    so the pages can award points. Returns {category: n_images}.
+    """
+    centroids, counts, categories, all_feats = [], {}, [], []
+    for category in sorted(os.listdir(image_dir)):
+        folder = os.path.join(image_dir, category)
+        if not os.path.isdir(folder):
+            continue
+        feats = []
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith((".jpg", ".jpeg", ".png")):
+                with open(os.path.join(folder, name), "rb") as f:
+                    feats.append(features(ingest(f)["image"]))
+        if feats:
+            categories.append(category)
+            counts[category] = len(feats)
+            centroids.append(np.mean(feats, axis=0))
+            all_feats.extend(feats)
+
+    if not categories:
+        raise ValueError(f"no labelled images under {image_dir}")
+
+    scale = np.maximum(np.std(all_feats, axis=0), 1e-3)
+    centroids = np.stack(centroids)
+    LinearModel(centroids, scale, categories).save(path)
+    return counts
+
+
+if __name__ == "__main__":
+    # python -m ecoverse.classifier fit <labelled_dir>
+    # python -m ecoverse.classifier predict <image> [<image> ...]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("fit", "predict"):
+        print("usage: python -m ecoverse.classifier fit <labelled_dir>\n"
+              "       python -m ecoverse.classifier predict <image> [...]")
+        sys.exit(1)
+
+    if sys.argv[1] == "fit":
+        for category, n in fit(sys.argv[2]).items():
+            print(f"{category}: {n} images")
+        print(f"saved {MODEL_PATH}")
+    else:
+        batch = []
+        for path in sys.argv[2:]:
+            with open(path, "rb") as f:
+                batch.append(ingest(f)["image"])
+        for path, r in zip(sys.argv[2:], classify(batch)):
+            print(f"{path}: {r['category']} ({r['confidence']:.0%}, {r['latency_ms']:.1f} ms)")
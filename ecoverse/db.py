@@ -0,0 +1,731 @@
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+
+from ecoverse import badges, dedupe, leaderboard, ledger, metrics, rollups, streaks
+from ecoverse.event_log import iter_events, iter_resolved
+from ecoverse.jsonio import load_json
+
+# ===============================
+# SQLITE SYSTEM OF RECORD
+# ===============================
+DATA_DIR = "data"
+DB_PATH = os.environ.get("ECOVERSE_DB", f"{DATA_DIR}/ecoverse.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    points INTEGER NOT NULL DEFAULT 0
+);
+-- Rankings come from the in-memory leaderboard (leaderboard.py)
+DROP INDEX IF EXISTS idx_users_points;
+
+CREATE TABLE IF NOT EXISTS carbon_records (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    travel_mode TEXT,
+    co2 REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_carbon_user_date ON carbon_records(user, date);
+CREATE INDEX IF NOT EXISTS idx_carbon_date ON carbon_records(date);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT,
+    reward TEXT,
+    co2 REAL,
+    points INTEGER NOT NULL DEFAULT 0,
+    points_spent INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    timestamp TEXT NOT NULL,
+    reward_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_txn_user_ts ON transactions(user, timestamp);
+CREATE INDEX IF NOT EXISTS idx_txn_user_type_ts ON transactions(user, type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_txn_status_ts ON transactions(status, timestamp);
+CREATE INDEX IF NOT EXISTS idx_txn_ts ON transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_txn_type_ts ON transactions(type, timestamp);
+-- Only pending rows: the approval queue stays small however long the log is
+CREATE INDEX IF NOT EXISTS idx_txn_pending ON transactions(id) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS rewards (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'General',
+    points_required INTEGER NOT NULL,
+    description TEXT,
+    approved INTEGER NOT NULL DEFAULT 0
+);
+
+-- Remaining units of stock-limited rewards (see rewards.py)
+CREATE TABLE IF NOT EXISTS reward_stock (
+    reward_id INTEGER PRIMARY KEY,
+    remaining INTEGER NOT NULL CHECK (remaining >= 0)
+);
+
+-- Bumped on every catalog change, so cached catalogs know when to reload
+CREATE TABLE IF NOT EXISTS rewards_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO rewards_state (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS rewards_version_ins AFTER INSERT ON rewards BEGIN
+    UPDATE rewards_state SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS rewards_version_upd AFTER UPDATE ON rewards BEGIN
+    UPDATE rewards_state SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS rewards_version_del AFTER DELETE ON rewards BEGIN
+    UPDATE rewards_state SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TABLE IF NOT EXISTS badges (
+    user TEXT NOT NULL,
+    badge TEXT NOT NULL,
+    awarded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user, badge)
+);
+
+-- Process-independent flags, e.g. imported=1 once the JSON import has run
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+"""
+
+TXN_COLUMNS = (
+    "user", "type", "category", "reward", "co2",
+    "points", "points_spent", "status", "timestamp", "reward_id",
+)
+
+KEY_TTL_DAYS = 30
+
+_local = threading.local()
+_ready = set()
+_setup_lock = threading.Lock()
+
+
+# ===============================
+# CONNECTIONS
+# ===============================
+class Connection(sqlite3.Connection):
+    """A connection that remembers its file, for per-database I/O metrics."""
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self.path = path
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, factory=Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def db_path(conn):
+    """The file behind conn: the key for per-database process caches."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def get_conn(path=DB_PATH):
+    """
+    A connection for the calling thread. Streamlit runs every rerun on a
+    new ScriptRunner thread, so this usually opens a fresh connection:
+    a plain open with no writes, so read-only page views never wait on
+    the write lock. Schema setup, the JSON import and the ledger catch-up
+    run once per process and database, in setup().
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    if path not in conns:
+        setup(path)
+        conns[path] = connect(path)
+    return conns[path]
+
+
+def setup(path=DB_PATH):
+    """
+    Create the schema, import the legacy JSON into an empty database,
+    bring balances and badges up to date and prune expired idempotency
+    keys. Runs once per process for each
+    database path; concurrent first callers wait for the one doing it.
+    """
+    if path in _ready:
+        return
+    with _setup_lock:
+        if path in _ready:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = connect(path)
+        try:
+            create_schema(conn)
+            import_json(conn, os.path.dirname(path) or ".")
+            with transaction(conn):
+                ledger.bootstrap(conn)
+                ledger.catch_up(conn)
+                badges.recompute(conn)
+                prune_keys(conn)
+        finally:
+            conn.close()
+        _ready.add(path)
+
+
+def create_schema(conn):
+    had_rollups = rollups.exists(conn)
+    had_streaks = streaks.exists(conn)
+    conn.executescript(SCHEMA)
+    conn.executescript(ledger.SCHEMA)
+    conn.executescript(rollups.SCHEMA)
+    conn.executescript(dedupe.SCHEMA)
+    conn.executescript(streaks.SCHEMA)
+    add_column(conn, "image_uploads", "colour", "INTEGER", backfill=dedupe.unindex_all)
+    add_column(conn, "transactions", "reward_id", "INTEGER", backfill=link_rewards)
+    if not had_rollups:
+        with transaction(conn):
+            rollups.rebuild(conn)
+    if not had_streaks:
+        with transaction(conn):
+            streaks.rebuild(conn)
+
+
+def add_column(conn, table, column, declaration, backfill=None):
+    """
+    Add a column to a table created before the column existed, running
+    backfill(conn) in the same transaction. Returns True if it was added.
+    """
+    if any(r[1] == column for r in conn.execute(f"PRAGMA table_info({table})")):
+        return False
+    with transaction(conn):
+        # Re-checked under the write lock: another process may have won
+        if any(r[1] == column for r in conn.execute(f"PRAGMA table_info({table})")):
+            return False
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        if backfill is not None:
+            backfill(conn)
+    return True
+
+
+@contextmanager
+def transaction(conn):
+    """
+    `with transaction(conn):` wraps the block in BEGIN IMMEDIATE / COMMIT
+    so multi-statement writes are applied atomically.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    path = getattr(conn, "path", None)
+    io_lock = _io_lock(path)
+    with io_lock:
+        before = wal_index(path)
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if before is None:
+        conn.execute("COMMIT")
+        return
+    with io_lock:
+        conn.execute("COMMIT")
+        _count_io(path, before, wal_index(path))
+
+
+# ===============================
+# I/O ACCOUNTING
+# ===============================
+# SQLite does not report bytes per file, but its WAL-index (the -shm
+# file, see "WAL-index format" in the SQLite file format docs) holds the
+# number of frames in the WAL (mxFrame) and how many of them have been
+# checkpointed into the database file (nBackfill). Both are read when a
+# transaction takes the write lock and again after COMMIT, whose
+# auto-checkpoint runs in the same call: the difference is what that
+# transaction wrote to the WAL and what was copied into the database.
+# The WAL restarts from frame 0 once fully checkpointed, so file-size
+# deltas would miss those writes; restarts are counted on their own.
+#
+# COMMIT releases the write lock before the second read, so a per-file
+# lock spans COMMIT and that read, and every transaction takes it for
+# its first read too: no other thread of this process can write frames
+# in between and have them counted twice. Other processes are not
+# covered, so with several processes writing (or checkpointing) the
+# counts are approximate.
+
+WAL_FRAME_HEADER = 24
+
+_io_locks = {}
+
+
+def _io_lock(path):
+    lock = _io_locks.get(path)
+    if lock is None:
+        lock = _io_locks.setdefault(path, threading.Lock())
+    return lock
+
+
+def wal_index(path):
+    """(page_size, mx_frame, n_backfill) from the -shm header, or None."""
+    if not path or path == ":memory:":
+        return None
+    try:
+        with open(f"{path}-shm", "rb") as f:
+            header = f.read(100)
+    except OSError:
+        return None
+    if len(header) < 100:
+        return None
+    page_size, mx_frame = struct.unpack_from("=HI", header, 14)
+    (n_backfill,) = struct.unpack_from("=I", header, 96)
+    return (65536 if page_size == 1 else page_size), mx_frame, n_backfill
+
+
+def _count_io(path, before, after):
+    if after is None:
+        return
+    page_size, mx_before, backfill_before = before
+    _, mx_after, backfill_after = after
+    label = metrics.file_label(path)
+    if mx_after < mx_before:
+        # The WAL restarted during this transaction; everything before the
+        # restart had already been checkpointed and counted
+        metrics.SQLITE_WAL_RESETS.inc(file=label)
+        mx_before = backfill_before = 0
+    frames = mx_after - mx_before
+    if frames > 0:
+        metrics.SQLITE_WAL_BYTES.inc(frames * (page_size + WAL_FRAME_HEADER), file=label)
+    checkpointed = backfill_after - backfill_before
+    if checkpointed > 0:
+        metrics.SQLITE_CHECKPOINT_BYTES.inc(checkpointed * page_size, file=label)
+
+
+def _rows(cursor):
+    return [dict(r) for r in cursor.fetchall()]
+
+
+# ===============================
+# USERS
+# ===============================
+# users.points is the materialized balance maintained by ecoverse.ledger;
+# point changes go through ledger.credit / debit / refund. A user's row is
+# created by their first write (ledger.catch_up inserts missing users), so
+# page renders only read and never take the write lock.
+
+def ensure_user(conn, user_id, name=None):
+    """Create the user's row; only for use inside a write transaction."""
+    conn.execute(
+        "INSERT OR IGNORE INTO users (id, name, points) VALUES (?, ?, 0)",
+        (user_id, name or user_id),
+    )
+
+
+def get_user(conn, user_id, name=None):
+    """The user's row, or a zero balance for a user with no writes yet."""
+    row = conn.execute(
+        "SELECT id, name, points FROM users WHERE id = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        return {"id": user_id, "name": name or user_id, "points": 0}
+    return dict(row)
+
+
+def total_points(conn):
+    return conn.execute("SELECT COALESCE(SUM(points), 0) FROM users").fetchone()[0]
+
+
+# ===============================
+# CARBON RECORDS
+# ===============================
+def insert_carbon_record(conn, record):
+    cur = conn.execute(
+        "INSERT INTO carbon_records (user, date, timestamp, travel_mode, co2) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (record["user"], record["date"], record["timestamp"],
+         record.get("travel_mode"), record["co2"]),
+    )
+    return cur.lastrowid
+
+
+def insert_carbon_records(conn, records):
+    conn.executemany(
+        "INSERT INTO carbon_records (user, date, timestamp, travel_mode, co2) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(r["user"], r["date"], r["timestamp"], r.get("travel_mode"), r["co2"])
+         for r in records],
+    )
+
+
+def user_carbon_records(conn, user_id):
+    return _rows(conn.execute(
+        "SELECT * FROM carbon_records WHERE user = ? ORDER BY date, id",
+        (user_id,),
+    ))
+
+
+def carbon_records_since(conn, since):
+    """All users' records from the ISO date `since` on."""
+    return _rows(conn.execute(
+        "SELECT * FROM carbon_records WHERE date >= ? ORDER BY date, id",
+        (since,),
+    ))
+
+
+# ===============================
+# TRANSACTIONS
+# ===============================
+def _txn_type(txn):
+    if txn.get("type"):
+        return txn["type"]
+    if "reward" in txn:
+        return "redemption"
+    return "waste_upload"
+
+
+def insert_transaction(conn, txn):
+    values = dict(txn, type=_txn_type(txn))
+    values.setdefault("points", 0)
+    values.setdefault("points_spent", 0)
+    cur = conn.execute(
+        f"INSERT INTO transactions ({', '.join(TXN_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in TXN_COLUMNS)})",
+        tuple(values.get(c) for c in TXN_COLUMNS),
+    )
+    return cur.lastrowid
+
+
+def insert_transactions(conn, txns):
+    """
+    Insert many transactions with one executemany and return their ids.
+    Must run inside transaction(conn): with the write lock held, new rows
+    take consecutive ids after the current maximum.
+    """
+    first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM transactions").fetchone()[0]
+    rows = []
+    for txn in txns:
+        values = dict(txn, type=_txn_type(txn))
+        values.setdefault("points", 0)
+        values.setdefault("points_spent", 0)
+        rows.append(tuple(values.get(c) for c in TXN_COLUMNS))
+    conn.executemany(
+        f"INSERT INTO transactions ({', '.join(TXN_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in TXN_COLUMNS)})",
+        rows,
+    )
+    return list(range(first, first + len(rows)))
+
+
+def user_transactions(conn, user_id, txn_type=None):
+    if txn_type is None:
+        cur = conn.execute(
+            "SELECT * FROM transactions WHERE user = ? ORDER BY timestamp, id",
+            (user_id,),
+        )
+    else:
+        cur = conn.execute(
+            "SELECT * FROM transactions WHERE user = ? AND type = ? "
+            "ORDER BY timestamp, id",
+            (user_id, txn_type),
+        )
+    return _rows(cur)
+
+
+def pending_queue(conn, limit=100, after_id=None):
+    """The oldest pending transactions (by id), read from idx_txn_pending."""
+    return _rows(conn.execute(
+        "SELECT * FROM transactions INDEXED BY idx_txn_pending "
+        "WHERE status = 'pending' AND id > ? "
+        "ORDER BY id LIMIT ?",
+        (after_id or 0, limit),
+    ))
+
+
+def transaction_page(conn, user=None, txn_type=None, status=None,
+                     since=None, until=None, before=None, limit=50):
+    """
+    One page of the audit log, newest first by (timestamp, id). Filters
+    are applied in SQL and paging is keyset-based: pass the previous
+    page's last (timestamp, id) as `before` to continue. SQLite walks an
+    index ending in (timestamp, rowid) in page order and stops after
+    `limit` matches rather than sorting them all. The index is the
+    narrowest one for the filters given: the user's (user, timestamp) or
+    (user, type, timestamp), else the status's (only redemptions have
+    one), else the type's. Filters the index does not cover are checked
+    along it, so a walk is bounded by that user's history or by the
+    redemptions with that status. `since`/`until` are ISO timestamps
+    (inclusive / exclusive).
+    """
+    clauses, params = [], []
+    for column, value in (("user", user), ("type", txn_type), ("status", status)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    if before is not None:
+        clauses.append("(timestamp, id) < (?, ?)")
+        params.extend(before)
+
+    # Without statistics SQLite may pick the type's index, and walk every
+    # row of a common type for a user (or status) that has none of them
+    index = ""
+    if user is not None:
+        index = "INDEXED BY idx_txn_user_type_ts " if txn_type is not None \
+            else "INDEXED BY idx_txn_user_ts "
+    elif status is not None:
+        index = "INDEXED BY idx_txn_status_ts "
+
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    return _rows(conn.execute(
+        f"SELECT * FROM transactions {index}{where}"
+        "ORDER BY timestamp DESC, id DESC LIMIT ?",
+        (*params, limit),
+    ))
+
+
+def link_rewards(conn):
+    """
+    Fill reward_id on redemptions recorded without one (legacy imports,
+    rows from before the column) by matching the reward name.
+    """
+    conn.execute(
+        "UPDATE transactions SET reward_id = "
+        "(SELECT id FROM rewards WHERE rewards.name = transactions.reward "
+        "ORDER BY id LIMIT 1) "
+        "WHERE type = 'redemption' AND reward_id IS NULL"
+    )
+
+
+def count_transactions(conn):
+    return rollups.total(conn)
+
+
+# ===============================
+# IDEMPOTENCY
+# ===============================
+def claim(conn, key):
+    """
+    Claim an idempotency key for the write about to happen in the
+    current transaction(conn). Returns False if the key was already used,
+    in which case the caller skips the write: a rerun or double submit
+    replays its key and is dropped with one primary-key lookup. The claim
+    rolls back with the transaction if the write fails.
+    """
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO idempotency_keys (key) VALUES (?)", (key,)
+    )
+    return cur.rowcount == 1
+
+
+def claim_batch(conn, keys):
+    """
+    Claim many keys in one step; returns one bool per key, False for the
+    ones already used. `keys` must be sorted, so the used ones are found
+    with a single range scan of the primary key.
+    """
+    if not keys:
+        return []
+    used = {r[0] for r in conn.execute(
+        "SELECT key FROM idempotency_keys WHERE key BETWEEN ? AND ?",
+        (keys[0], keys[-1]),
+    )}
+    conn.executemany(
+        "INSERT INTO idempotency_keys (key) VALUES (?)",
+        [(k,) for k in keys if k not in used],
+    )
+    return [k not in used for k in keys]
+
+
+def prune_keys(conn, max_age_days=KEY_TTL_DAYS):
+    """
+    Forget request keys older than max_age_days: by then no retry or
+    double submit of that request can still arrive. Bulk-import row keys
+    (import:...) are kept, so a file imported again is always recognised.
+    Returns the number of keys removed.
+    """
+    cur = conn.execute(
+        "DELETE FROM idempotency_keys "
+        "WHERE created_at < datetime('now', ?) "
+        "AND NOT (key >= 'import:' AND key < 'import;')",
+        (f"-{int(max_age_days)} days",),
+    )
+    return cur.rowcount
+
+
+def claimed(conn, key):
+    """True if `key` was already used (authoritative under transaction(conn))."""
+    return conn.execute(
+        "SELECT 1 FROM idempotency_keys WHERE key = ?", (key,)
+    ).fetchone() is not None
+
+
+# ===============================
+# BADGES
+# ===============================
+def user_badges(conn, user_id):
+    return [r[0] for r in conn.execute(
+        "SELECT badge FROM badges WHERE user = ? ORDER BY awarded_at, badge",
+        (user_id,),
+    )]
+
+
+# ===============================
+# DEMO RESET
+# ===============================
+def reset_demo_data(conn):
+    """
+    Clear all activity and the state derived from it (balances, badges,
+    streaks, known uploads, idempotency keys), leaving only demo_user.
+    The rewards catalog and stock are configuration and stay.
+    """
+    with transaction(conn):
+        for table in ("transactions", "carbon_records", "image_uploads", "streaks",
+                      "badges", "users", "idempotency_keys"):
+            conn.execute(f"DELETE FROM {table}")
+        ledger.reset(conn)
+        conn.execute(
+            "INSERT INTO users (id, name, points) VALUES ('demo_user', 'Demo User', 0)"
+        )
+    leaderboard.invalidate(conn)
+
+
+# ===============================
+# ONE-SHOT JSON IMPORT
+# ===============================
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def imported(conn):
+    return conn.execute(
+        "SELECT 1 FROM meta WHERE key = 'imported'"
+    ).fetchone() is not None
+
+
+def import_json(conn, data_dir=DATA_DIR):
+    """
+    Load the legacy data/*.json files (and the JSONL event logs, when
+    present) into the database, once. The check and the import share one
+    write transaction and meta.imported records the outcome, so sessions
+    racing on a fresh deploy cannot both import. A database that already
+    holds users or transactions (created before the marker existed) is
+    only marked. Returns the number of rows per table, or None if the
+    import had already happened.
+    """
+    with transaction(conn):
+        if imported(conn):
+            return None
+        conn.execute("INSERT INTO meta (key, value) VALUES ('imported', '1')")
+        if conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM users) OR EXISTS (SELECT 1 FROM transactions)"
+        ).fetchone()[0]:
+            return None
+        return _import_files(conn, data_dir)
+
+
+def _import_files(conn, data_dir):
+    users = load_json(f"{data_dir}/users.json", {})
+    rewards = load_json(f"{data_dir}/rewards.json", [])
+    badges = load_json(f"{data_dir}/badges.json", {})
+
+    carbon_log = f"{data_dir}/carbon_records.jsonl"
+    if os.path.exists(carbon_log):
+        carbon = iter_events(carbon_log)
+    else:
+        carbon = load_json(f"{data_dir}/carbon_records.json", [])
+
+    txn_log = f"{data_dir}/transactions.jsonl"
+    if os.path.exists(txn_log):
+        transactions = iter_resolved(txn_log)
+    else:
+        transactions = load_json(f"{data_dir}/transactions.json", [])
+
+    counts = {}
+    conn.executemany(
+        "INSERT OR REPLACE INTO users (id, name, points) VALUES (?, ?, ?)",
+        [(uid, u.get("name", uid), int(u.get("points", 0)))
+         for uid, u in users.items()],
+    )
+    counts["users"] = len(users)
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO rewards "
+        "(id, name, type, points_required, description, approved) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(_as_int(r.get("id")), r["name"], r.get("type", "General"),
+          int(r["points_required"]), r.get("description"),
+          int(bool(r.get("approved"))))
+         for r in rewards],
+    )
+    counts["rewards"] = len(rewards)
+    conn.executemany(
+        "INSERT OR REPLACE INTO reward_stock (reward_id, remaining) VALUES (?, ?)",
+        [(_as_int(r.get("id")), int(r["stock"]))
+         for r in rewards
+         if r.get("stock") is not None and _as_int(r.get("id")) is not None],
+    )
+
+    badge_rows = [(uid, b) for uid, names in badges.items() for b in names]
+    conn.executemany(
+        "INSERT OR IGNORE INTO badges (user, badge) VALUES (?, ?)", badge_rows
+    )
+    counts["badges"] = len(badge_rows)
+
+    counts["carbon_records"] = 0
+    for record in carbon:
+        insert_carbon_record(conn, record)
+        counts["carbon_records"] += 1
+    streaks.rebuild(conn)
+
+    counts["transactions"] = 0
+    for txn in transactions:
+        insert_transaction(conn, txn)
+        counts["transactions"] += 1
+    link_rewards(conn)
+
+    return counts
+
+
+# ===============================
+# CLI
+# ===============================
+if __name__ == "__main__":
+    # python -m ecoverse.db import [data_dir]
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        print("usage: python -m ecoverse.db import [data_dir]")
+        sys.exit(1)
+
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else DATA_DIR
+    path = os.environ.get("ECOVERSE_DB", f"{data_dir}/ecoverse.db")
+    if os.path.exists(path):
+        print(f"{path} already exists; remove it to re-import.")
+        sys.exit(1)
+
+    conn = connect(path)
+    create_schema(conn)
+    for table, n in (import_json(conn, data_dir) or {}).items():
+        print(f"{table}: {n}")
+    with transaction(conn):
+        ledger.bootstrap(conn)
@@ -0,0 +1,157 @@
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+# ===============================
+# UPLOAD DEDUPLICATION
+# ===============================
+# Every accepted waste photo is recorded under its SHA-256 (exact repeats)
+# and a 64-bit difference hash (re-encoded, resized or re-shot copies).
+# The row also caches the classification, so a repeat upload is answered
+# from here without classifying again or awarding points twice.
+#
+# Near-duplicate lookup uses four 16-bit bands of the dHash, each indexed:
+# two hashes within NEAR_DISTANCE (< 4) bits must agree exactly on at least
+# one band, so a query only checks the few rows sharing a band rather than
+# scanning the table.
+#
+# A hash alone is not enough to call two photos the same. Flat or
+# low-texture images (a plain sheet, a dark frame) all hash to nearly
+# every bit equal, so hashes with fewer than MIN_BITS set or clear bits
+# never near-match and are stored unindexed (bands = -1). A near match
+# also needs the mean colours to agree within COLOUR_TOLERANCE per
+# channel. Rows without a colour (recorded before it was kept) only
+# match exactly.
+
+NEAR_DISTANCE = 3
+BANDS = 4
+MIN_BITS = 8
+COLOUR_TOLERANCE = 24
+UNINDEXED = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_uploads (
+    sha256 TEXT PRIMARY KEY,
+    phash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    category TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    txn_id INTEGER,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    colour INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_band0 ON image_uploads(band0);
+CREATE INDEX IF NOT EXISTS idx_uploads_band1 ON image_uploads(band1);
+CREATE INDEX IF NOT EXISTS idx_uploads_band2 ON image_uploads(band2);
+CREATE INDEX IF NOT EXISTS idx_uploads_band3 ON image_uploads(band3);
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(img):
+    """64-bit difference hash: is each pixel brighter than its right neighbour?"""
+    grey = np.asarray(img.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (grey[:, 1:] > grey[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def mean_colour(img):
+    """Mean RGB packed as 0xRRGGBB."""
+    r, g, b = np.asarray(img.convert("RGB").resize((16, 16)), dtype=np.float64) \
+        .reshape(-1, 3).mean(axis=0).round().astype(int)
+    return (int(r) << 16) | (int(g) << 8) | int(b)
+
+
+def informative(phash):
+    """True if the hash has enough structure to stand for one photo."""
+    bits = bin(phash).count("1")
+    return MIN_BITS <= bits <= 64 - MIN_BITS
+
+
+def colours_agree(a, b, tolerance=COLOUR_TOLERANCE):
+    if a is None or b is None:
+        return False
+    return all(abs(((a >> shift) & 0xFF) - ((b >> shift) & 0xFF)) <= tolerance
+               for shift in (16, 8, 0))
+
+
+def _bands(phash):
+    return [(phash >> (16 * i)) & 0xFFFF for i in range(BANDS)]
+
+
+def _indexed_bands(phash, colour):
+    if colour is None or not informative(phash):
+        return [UNINDEXED] * BANDS
+    return _bands(phash)
+
+
+def unindex_all(conn):
+    """Backfill for the colour column: older rows only match exactly."""
+    conn.execute(
+        "UPDATE image_uploads SET band0 = ?, band1 = ?, band2 = ?, band3 = ?",
+        [UNINDEXED] * BANDS,
+    )
+
+
+def _signed(phash):
+    # SQLite integers are signed 64-bit
+    return phash - (1 << 64) if phash >= (1 << 63) else phash
+
+
+def _unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def find_exact(conn, sha256):
+    row = conn.execute(
+        "SELECT * FROM image_uploads WHERE sha256 = ?", (sha256,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def find_similar(conn, phash, colour, max_distance=NEAR_DISTANCE):
+    """
+    The closest recorded upload within max_distance bits whose colour
+    also agrees, or None. Uninformative hashes never match.
+    """
+    if not informative(phash):
+        return None
+    best, best_distance = None, max_distance + 1
+    for row in conn.execute(
+        "SELECT * FROM image_uploads "
+        "WHERE band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?",
+        _bands(phash),
+    ):
+        distance = bin(_unsigned(row["phash"]) ^ phash).count("1")
+        if distance < best_distance and colours_agree(row["colour"], colour):
+            best, best_distance = dict(row), distance
+    return best
+
+
+def record(conn, sha256, phash, colour, user, category, confidence, txn_id=None):
+    """
+    Record an accepted upload. Returns False if the same content was
+    recorded concurrently, in which case the caller must not award points.
+    """
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO image_uploads "
+        "(sha256, phash, band0, band1, band2, band3, colour, user, category, "
+        "confidence, txn_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (sha256, _signed(phash), *_indexed_bands(phash, colour), colour,
+         user, category, confidence, txn_id),
+    )
+    return cur.rowcount == 1
+
+
+def set_txn(conn, sha256, txn_id):
+    conn.execute(
+        "UPDATE image_uploads SET txn_id = ? WHERE sha256 = ?", (txn_id, sha256)
+    )
@@ -0,0 +1,51 @@
+import json
+import os
+
+from ecoverse import metrics
+
+# ===============================
+# JSONL EVENT LOG (READ SIDE)
+# ===============================
+# Legacy append-only logs: one JSON record per line, with status changes
+# appended as "status_update" events instead of rewritten in place. The
+# app now writes to SQLite; these readers are what db.import_json uses to
+# bring an existing log across.
+
+
+def iter_events(path):
+    """
+    Stream records from the log one line at a time.
+    A torn last line (crash mid-write) is skipped instead of failing the read.
+    """
+    if not os.path.exists(path):
+        return
+    label = metrics.file_label(path)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            metrics.FILE_READ_BYTES.inc(len(line), file=label)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_resolved(path):
+    """
+    Stream records with "status_update" events folded into their target.
+    Status changes are appended rather than rewritten in place, so the
+    first pass only collects the (small) set of updates.
+    """
+    latest = {}
+    for event in iter_events(path):
+        if event.get("type") == "status_update":
+            latest[event["target"]] = event["status"]
+
+    for record in iter_events(path):
+        if record.get("type") == "status_update":
+            continue
+        if record.get("id") in latest:
+            record["status"] = latest[record["id"]]
+        yield record
@@ -0,0 +1,140 @@
+import argparse
+import csv
+import os
+import sys
+
+from ecoverse import db, metrics
+
+# ===============================
+# STREAMING EXPORT
+# ===============================
+# Exports run one SELECT and pull rows with fetchmany, so memory stays at
+# one chunk whatever the history size, and the whole export reads a
+# single consistent snapshot (WAL keeps it stable while writers go on).
+# CSV is written row by row; Parquet one row group per chunk.
+#
+# The CLI writes straight to a file on the server and has no size limit.
+# The admin page's download button has to hold the file in server memory
+# for the session, so it passes `limit` and sends larger exports to the
+# CLI.
+
+CHUNK_ROWS = 50_000
+
+# table -> column the date-range filter applies to
+TABLES = {
+    "transactions": "timestamp",
+    "carbon_records": "date",
+}
+
+SQL_TO_ARROW = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+def columns(conn, table):
+    return [(r[1], r[2].upper()) for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def iter_chunks(conn, table, user=None, since=None, until=None, limit=None,
+                chunk_rows=CHUNK_ROWS):
+    """
+    Yield lists of row tuples (in column order) for `table`, oldest first.
+    `since`/`until` are ISO dates or timestamps (inclusive / exclusive);
+    `limit` stops after that many rows.
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown table: {table!r}")
+    when = TABLES[table]
+
+    clauses, params = [], []
+    if user is not None:
+        clauses.append("user = ?")
+        params.append(user)
+    if since is not None:
+        clauses.append(f"{when} >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{when} < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    sql = f"SELECT * FROM {table} {where}ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    cur = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield [tuple(r) for r in rows]
+    finally:
+        cur.close()
+
+
+def write_csv(conn, table, out, **filters):
+    """Stream `table` as CSV into the text file object `out`; returns the row count."""
+    writer = csv.writer(out)
+    writer.writerow([name for name, _ in columns(conn, table)])
+    count = 0
+    for rows in iter_chunks(conn, table, **filters):
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def write_parquet(conn, table, out, **filters):
+    """Stream `table` as Parquet into a path or binary file; returns the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+    cols = columns(conn, table)
+    schema = pa.schema([
+        (name, getattr(pa, SQL_TO_ARROW.get(decl, "string"))()) for name, decl in cols
+    ])
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in iter_chunks(conn, table, **filters):
+            arrays = [
+                pa.array([r[i] for r in rows], type=schema.field(i).type)
+                for i in range(len(cols))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export(conn, table, path, fmt=None, **filters):
+    """Write `table` to `path`; fmt ("csv" / "parquet") defaults to the extension."""
+    if fmt is None:
+        fmt = "parquet" if path.lower().endswith(".parquet") else "csv"
+    if fmt == "parquet":
+        count = write_parquet(conn, table, path, **filters)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            count = write_csv(conn, table, f, **filters)
+    # Export paths are often temp files: label by table, not file name
+    metrics.FILE_WRITE_BYTES.inc(os.path.getsize(path), file=f"export:{table}")
+    return count
+
+
+# ===============================
+# CLI
+# ===============================
+if __name__ == "__main__":
+    # python -m ecoverse.export transactions out.csv [--user U] [--since D] [--until D]
+    parser = argparse.ArgumentParser(prog="python -m ecoverse.export")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path", help="output file (.csv or .parquet)")
+    parser.add_argument("--user")
+    parser.add_argument("--since", help="ISO date, inclusive")
+    parser.add_argument("--until", help="ISO date, exclusive")
+    args = parser.parse_args()
+
+    n = export(
+        db.get_conn(), args.table, args.path,
+        user=args.user, since=args.since, until=args.until,
+    )
+    print(f"{args.table}: {n} rows -> {args.path}", file=sys.stderr)
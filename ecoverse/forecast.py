@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+
+from ecoverse import db
+
+# ===============================
+# LOCAL EMISSION FORECASTING
+# ===============================
+# Each user's daily CO2 totals (last WINDOW logged days) are modelled as
+#     y = level + slope * days + weekday effect
+# where slope is the least-squares trend over the window, the weekday
+# effect is the mean detrended residual for that weekday (only once there
+# is enough history) and level is an EWMA of the deseasonalized series
+# anchored at the latest log. Users are padded into one (users x WINDOW)
+# matrix with a mask, so a whole campus is fitted with a handful of array
+# operations; a single user is just a batch of one.
+
+WINDOW = 28
+HORIZON = 7
+MIN_DAYS = 3
+EWMA_ALPHA = 0.3
+SEASONAL_MIN_DAYS = 14
+TREND_THRESHOLD = 0.02  # relative change per day that counts as a trend
+OUTLOOK_TTL = 300  # seconds a campus outlook is reused while new logs arrive
+
+
+def _daily_totals(records):
+    """{user: [(date, co2), ...]} with same-day entries summed, oldest first."""
+    totals = defaultdict(lambda: defaultdict(float))
+    for r in records:
+        totals[r.get("user")][date.fromisoformat(r["date"][:10])] += r["co2"]
+    return {
+        user: sorted(days.items())[-WINDOW:]
+        for user, days in totals.items()
+    }
+
+
+def _trend_label(slope, mean):
+    if mean <= 0:
+        return "stable"
+    rel = slope / mean
+    if rel > TREND_THRESHOLD:
+        return "increasing"
+    if rel < -TREND_THRESHOLD:
+        return "decreasing"
+    return "stable"
+
+
+def _fit(series, horizon):
+    users = list(series)
+    n_users = len(users)
+
+    y = np.zeros((n_users, WINDOW))
+    x = np.zeros((n_users, WINDOW))
+    wd = np.zeros((n_users, WINDOW), dtype=np.int64)
+    mask = np.zeros((n_users, WINDOW), dtype=bool)
+    last = []
+
+    for i, user in enumerate(users):
+        days = series[user]
+        n = len(days)
+        origin = days[-1][0]
+        last.append(origin)
+        # right-align so column WINDOW-1 is each user's latest log
+        y[i, WINDOW - n:] = [v for _, v in days]
+        x[i, WINDOW - n:] = [(d - origin).days for d, _ in days]
+        wd[i, WINDOW - n:] = [d.weekday() for d, _ in days]
+        mask[i, WINDOW - n:] = True
+
+    m = mask.astype(float)
+    count = m.sum(axis=1)
+
+    # Least-squares trend
+    x_mean = (x * m).sum(axis=1) / count
+    y_mean = (y * m).sum(axis=1) / count
+    dx = (x - x_mean[:, None]) * m
+    dy = (y - y_mean[:, None]) * m
+    sxx = (dx * dx).sum(axis=1)
+    slope = np.divide((dx * dy).sum(axis=1), sxx, out=np.zeros(n_users), where=sxx > 0)
+
+    # Weekday effect from detrended residuals
+    resid = (dy - slope[:, None] * dx) * m
+    onehot = (wd[:, :, None] == np.arange(7)) & mask[:, :, None]
+    wd_count = onehot.sum(axis=1)
+    wd_sum = (resid[:, :, None] * onehot).sum(axis=1)
+    season = np.divide(wd_sum, wd_count, out=np.zeros((n_users, 7)), where=wd_count > 1)
+    season[count < SEASONAL_MIN_DAYS] = 0.0
+
+    # EWMA level of the deseasonalized, detrended-to-latest series
+    deseason = y - np.take_along_axis(season, wd, axis=1) - slope[:, None] * x
+    weights = (1 - EWMA_ALPHA) ** np.arange(WINDOW - 1, -1, -1) * m
+    level = (deseason * weights).sum(axis=1) / weights.sum(axis=1)
+
+    # Forecast the HORIZON days after each user's latest log
+    steps = np.arange(1, horizon + 1)
+    results = {}
+    for i, user in enumerate(users):
+        dates = [last[i] + timedelta(days=int(h)) for h in steps]
+        future_wd = np.array([d.weekday() for d in dates])
+        values = np.maximum(level[i] + slope[i] * steps + season[i, future_wd], 0.0)
+        results[user] = {
+            "dates": dates,
+            "co2": [round(float(v), 2) for v in values],
+            "average": round(float(values.mean()), 2),
+            "slope": round(float(slope[i]), 3),
+            "trend": _trend_label(slope[i], y_mean[i]),
+        }
+    return results
+
+
+def forecast_all(records, horizon=HORIZON):
+    """
+    Fit every user in `records` (dicts with user, date, co2) in one
+    batch. Users with fewer than MIN_DAYS logged days are left out.
+    """
+    series = {
+        user: days for user, days in _daily_totals(records).items()
+        if len(days) >= MIN_DAYS
+    }
+    if not series:
+        return {}
+    return _fit(series, horizon)
+
+
+def forecast(records, horizon=HORIZON):
+    """Forecast for one user's records, or None without enough history."""
+    records = [dict(r, user=None) for r in records]
+    return forecast_all(records, horizon).get(None)
+
+
+# ===============================
+# CAMPUS OUTLOOK
+# ===============================
+# The admin outlook refits every user active in the last WINDOW days, so
+# one result per database is shared by every session and rerun. It is
+# refitted when the day changes, when carbon records were deleted (the
+# newest id went down) or when new ones were logged, but then at most
+# once per OUTLOOK_TTL seconds: a 7-day outlook does not need to follow
+# each new log, and a busy campus would otherwise refit on every rerun.
+
+_outlooks = {}
+_outlooks_lock = threading.Lock()
+
+
+def campus_outlook(conn, today=None):
+    """forecast_all over every user's last WINDOW days, cached per database."""
+    today = today or date.today()
+    path = db.db_path(conn)
+    newest = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) FROM carbon_records"
+    ).fetchone()[0]
+    now = time.monotonic()
+
+    cached = _outlooks.get(path)
+    if cached is not None:
+        day, seen, fitted_at, outlook = cached
+        if day == today and (newest == seen or
+                             (newest > seen and now - fitted_at < OUTLOOK_TTL)):
+            return outlook
+
+    records = db.carbon_records_since(conn, (today - timedelta(days=WINDOW)).isoformat())
+    outlook = forecast_all(records)
+    with _outlooks_lock:
+        _outlooks[path] = (today, newest, now, outlook)
+    return outlook
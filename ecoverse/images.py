@@ -0,0 +1,87 @@
+import warnings
+
+from PIL import Image, ImageOps
+
+# ===============================
+# IMAGE INGESTION
+# ===============================
+# Uploads are checked before anything is decoded (byte size, then the
+# header's pixel dimensions), decoded with JPEG draft mode straight to
+# roughly the working size, oriented from EXIF and downscaled. Only the
+# small working copy and display thumbnail are kept, so per-upload memory
+# and latency stay flat whatever the camera resolution.
+#
+# Draft mode only exists for JPEG: a PNG is decoded at full size before it
+# can be shrunk, so it gets a much lower pixel cap.
+
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_PIXELS = 50_000_000       # JPEG, decoded at down to 1/8 scale
+MAX_PIXELS_FULL = 4_000_000   # formats decoded at full size (~16 MB as RGBA)
+WORKING_SIZE = 512
+THUMBNAIL_SIZE = 320
+ALLOWED_FORMATS = {"JPEG", "PNG"}
+
+
+class ImageRejected(ValueError):
+    """The upload is not an image we are willing to decode."""
+
+
+def _byte_size(fileobj):
+    size = getattr(fileobj, "size", None)
+    if size is None:
+        pos = fileobj.tell()
+        fileobj.seek(0, 2)
+        size = fileobj.tell()
+        fileobj.seek(pos)
+    return size
+
+
+def ingest(fileobj):
+    """
+    Returns {"image": RGB working copy (longest side <= WORKING_SIZE),
+    "thumbnail": RGB display copy, "original_size": (w, h), "format"}.
+    Raises ImageRejected for oversize, unsupported or corrupt input.
+    """
+    if _byte_size(fileobj) > MAX_UPLOAD_BYTES:
+        raise ImageRejected(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            img = Image.open(fileobj)  # reads the header only
+    except (Image.DecompressionBombWarning, Image.DecompressionBombError) as exc:
+        raise ImageRejected("Image dimensions are too large") from exc
+    except (OSError, SyntaxError) as exc:
+        raise ImageRejected("Not a readable image") from exc
+
+    fmt = img.format
+    if fmt not in ALLOWED_FORMATS:
+        raise ImageRejected(f"Unsupported image format: {fmt}")
+
+    width, height = img.size
+    limit = MAX_PIXELS if fmt == "JPEG" else MAX_PIXELS_FULL
+    if width * height > limit:
+        hint = "" if fmt == "JPEG" else "; upload a JPEG for larger photos"
+        raise ImageRejected(
+            f"{fmt} image has {width * height:,} pixels (max {limit:,}{hint})"
+        )
+
+    try:
+        # JPEG: decode at 1/2, 1/4 or 1/8 scale, whichever still covers
+        # the working size; a no-op for other formats
+        img.draft("RGB", (WORKING_SIZE, WORKING_SIZE))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((WORKING_SIZE, WORKING_SIZE))
+        working = img.convert("RGB")
+    except (OSError, SyntaxError) as exc:
+        raise ImageRejected("Image data is corrupt or truncated") from exc
+
+    thumbnail = working.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+
+    return {
+        "image": working,
+        "thumbnail": thumbnail,
+        "original_size": (width, height),
+        "format": fmt,
+    }
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+from ecoverse import metrics
+
+# ===============================
+# SHARED JSON LOADER
+# ===============================
+# One parse per file version for the whole process: every session and
+# rerun shares the cached object until the file's mtime or size changes.
+# Cached objects are shared, so callers must treat them as read-only.
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_json(path, default):
+    try:
+        sig = file_signature(path)
+    except FileNotFoundError:
+        return default
+
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == sig:
+        metrics.JSON_CACHE.inc(result="hit")
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == sig:
+            metrics.JSON_CACHE.inc(result="hit")
+            return entry[1]
+
+        metrics.JSON_CACHE.inc(result="miss")
+        label = metrics.file_label(path)
+        try:
+            with open(path, "r") as f:
+                content = f.read().strip()
+            metrics.FILE_READ_BYTES.inc(sig[1], file=label)
+            started = time.perf_counter()
+            data = json.loads(content) if content else default
+            metrics.JSON_PARSE_SECONDS.observe(time.perf_counter() - started, file=label)
+        except json.JSONDecodeError:
+            return default
+
+        _cache[path] = (sig, data)
+        return data
+
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(path, None)
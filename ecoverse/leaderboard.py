@@ -0,0 +1,121 @@
+import bisect
+import threading
+
+from ecoverse import db, ledger
+
+# ===============================
+# LEADERBOARD INDEX
+# ===============================
+# A process-wide sorted index of (-points, user) shared by every session.
+# refresh() re-reads only the users touched by ledger entries past the
+# index's offset (plus users created since), so keeping it current costs
+# O(changes); top-K pages and rank lookups are bisects over the index.
+# Call invalidate() after deleting users (demo reset) to force a rebuild.
+
+
+class Leaderboard:
+    def __init__(self):
+        self._keys = []       # sorted (-points, user_id)
+        self._users = {}      # user_id -> (points, name)
+        self._offset = 0      # last ledger entry folded in
+        self._max_rowid = 0   # newest users row seen
+        self._lock = threading.Lock()
+
+    def _place(self, user_id, name, points):
+        old = self._users.get(user_id)
+        if old is not None:
+            i = bisect.bisect_left(self._keys, (-old[0], user_id))
+            del self._keys[i]
+        bisect.insort(self._keys, (-points, user_id))
+        self._users[user_id] = (points, name)
+
+    def _clear(self):
+        self._keys = []
+        self._users = {}
+        self._offset = 0
+        self._max_rowid = 0
+
+    def refresh(self, conn):
+        offset = ledger.last_applied(conn)
+        max_rowid = conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM users"
+        ).fetchone()[0]
+
+        with self._lock:
+            if offset == self._offset and max_rowid == self._max_rowid:
+                return
+            if max_rowid < self._max_rowid:
+                self._clear()
+
+            rows = conn.execute(
+                "SELECT id, name, points FROM users WHERE rowid > ? "
+                "OR id IN (SELECT user FROM ledger WHERE id > ? AND id <= ?)",
+                (self._max_rowid, self._offset, offset),
+            ).fetchall()
+            for user_id, name, points in rows:
+                self._place(user_id, name, points)
+
+            self._offset = offset
+            self._max_rowid = max_rowid
+
+    def _rank_of_points(self, points):
+        # Competition ranking: ties share the best position.
+        return bisect.bisect_left(self._keys, (-points,)) + 1
+
+    def top(self, k, start=0):
+        with self._lock:
+            page = self._keys[start:start + k]
+            return [
+                {
+                    "rank": self._rank_of_points(-neg),
+                    "id": user_id,
+                    "name": self._users[user_id][1],
+                    "points": -neg,
+                }
+                for neg, user_id in page
+            ]
+
+    def rank(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            return self._rank_of_points(entry[0])
+
+    def __len__(self):
+        return len(self._keys)
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def get(conn):
+    """The shared, refreshed leaderboard for the database behind conn."""
+    path = db.db_path(conn)
+    with _boards_lock:
+        board = _boards.get(path)
+        if board is None:
+            board = _boards[path] = Leaderboard()
+    board.refresh(conn)
+    return board
+
+
+def top(conn, k, start=0):
+    return get(conn).top(k, start)
+
+
+def rank(conn, user_id):
+    return get(conn).rank(user_id)
+
+
+def size(conn):
+    return len(get(conn))
+
+
+def invalidate(conn=None):
+    with _boards_lock:
+        if conn is None:
+            _boards.clear()
+        else:
+            _boards.pop(db.db_path(conn), None)
@@ -0,0 +1,145 @@
+from ecoverse import badges
+
+# ===============================
+# POINTS LEDGER
+# ===============================
+# Every point change is a typed, append-only ledger entry. users.points is
+# only a materialized balance: catch_up folds entries past the last
+# applied offset into it, so a balance read is one primary-key lookup and
+# bringing balances up to date costs O(new entries), never a full replay.
+# Point badges crossed by a catch-up are awarded in the same step.
+#
+# All functions expect to run inside db.transaction(conn) so the entry
+# and the balance it moves commit together.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('credit', 'debit', 'refund')),
+    amount INTEGER NOT NULL CHECK (amount >= 0),
+    txn_id INTEGER,
+    timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_user ON ledger(user, id);
+
+CREATE TABLE IF NOT EXISTS ledger_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_applied INTEGER NOT NULL
+);
+"""
+
+SIGNED_AMOUNT = "CASE kind WHEN 'debit' THEN -amount ELSE amount END"
+
+
+def last_applied(conn):
+    row = conn.execute("SELECT last_applied FROM ledger_state WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def catch_up(conn):
+    """
+    Apply entries written since the last applied offset to users.points.
+    Returns the number of users whose balance moved.
+    """
+    offset = last_applied(conn)
+    # NOT INDEXED: left to itself the planner serves GROUP BY user from a
+    # full walk of idx_ledger_user instead of the rowid range past offset
+    deltas = conn.execute(
+        f"SELECT user, SUM({SIGNED_AMOUNT}), MAX(id) FROM ledger NOT INDEXED "
+        "WHERE id > ? GROUP BY user",
+        (offset,),
+    ).fetchall()
+    if not deltas:
+        return 0
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (id, name, points) VALUES (?, ?, 0)",
+        [(user, user) for user, _, _ in deltas],
+    )
+    conn.executemany(
+        "UPDATE users SET points = points + ? WHERE id = ?",
+        [(delta, user) for user, delta, _ in deltas],
+    )
+    gains = [(user, delta) for user, delta, _ in deltas if delta > 0]
+    if gains:
+        changes = []
+        for user, delta in gains:
+            new = balance(conn, user)
+            changes.append((user, new - delta, new))
+        badges.on_points(conn, changes)
+    conn.execute(
+        "INSERT OR REPLACE INTO ledger_state (id, last_applied) VALUES (1, ?)",
+        (max(last_id for _, _, last_id in deltas),),
+    )
+    return len(deltas)
+
+
+def post(conn, user_id, kind, amount, txn_id=None):
+    cur = conn.execute(
+        "INSERT INTO ledger (user, kind, amount, txn_id) VALUES (?, ?, ?, ?)",
+        (user_id, kind, int(amount), txn_id),
+    )
+    catch_up(conn)
+    return cur.lastrowid
+
+
+def post_many(conn, entries):
+    """Post (user, kind, amount, txn_id) entries and catch up once."""
+    conn.executemany(
+        "INSERT INTO ledger (user, kind, amount, txn_id) VALUES (?, ?, ?, ?)",
+        [(user, kind, int(amount), txn_id) for user, kind, amount, txn_id in entries],
+    )
+    catch_up(conn)
+
+
+def credit(conn, user_id, amount, txn_id=None):
+    return post(conn, user_id, "credit", amount, txn_id)
+
+
+def refund(conn, user_id, amount, txn_id=None):
+    return post(conn, user_id, "refund", amount, txn_id)
+
+
+def debit(conn, user_id, amount, txn_id=None):
+    """
+    Spend points only if the balance covers them; returns True on success.
+    The check and the entry share the caller's write transaction.
+    """
+    if balance(conn, user_id) < amount:
+        return False
+    post(conn, user_id, "debit", amount, txn_id)
+    return True
+
+
+def balance(conn, user_id):
+    row = conn.execute("SELECT points FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def bootstrap(conn):
+    """
+    First run on a database without a ledger: record each user's existing
+    balance as an opening entry and mark it applied, so the ledger and
+    users.points agree from then on.
+    """
+    if conn.execute("SELECT 1 FROM ledger_state WHERE id = 1").fetchone():
+        return
+
+    users = conn.execute("SELECT id, points FROM users WHERE points != 0").fetchall()
+    conn.executemany(
+        "INSERT INTO ledger (user, kind, amount) VALUES (?, ?, ?)",
+        [(uid, "credit" if pts > 0 else "debit", abs(pts)) for uid, pts in users],
+    )
+    top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM ledger").fetchone()[0]
+    conn.execute(
+        "INSERT INTO ledger_state (id, last_applied) VALUES (1, ?)", (top,)
+    )
+
+
+def reset(conn):
+    conn.execute("DELETE FROM ledger")
+    conn.execute(
+        "INSERT OR REPLACE INTO ledger_state (id, last_applied) VALUES (1, "
+        "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ledger'), 0))"
+    )
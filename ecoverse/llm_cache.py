@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ecoverse import metrics
+from ecoverse.db import DATA_DIR, connect
+
+# ===============================
+# PERSISTENT LLM RESPONSE CACHE
+# ===============================
+# Completions keyed on the exact request (model, rendered prompt, sampling
+# parameters), stored in their own SQLite file so cache traffic never
+# contends with the system of record. Entries expire after TTL_SECONDS
+# and the least recently used are evicted beyond MAX_ENTRIES.
+
+CACHE_PATH = os.environ.get("ECOVERSE_LLM_CACHE", f"{DATA_DIR}/llm_cache.db")
+MAX_ENTRIES = 2000
+TTL_SECONDS = 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used);
+"""
+
+_local = threading.local()
+
+
+def _conn(path=CACHE_PATH):
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    if path not in conns:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = connect(path)
+        conn.executescript(SCHEMA)
+        conns[path] = conn
+    return conns[path]
+
+
+def make_key(model, prompt, **params):
+    payload = json.dumps([model, prompt, params], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key, path=CACHE_PATH):
+    conn = _conn(path)
+    now = time.time()
+    row = conn.execute(
+        "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    if now - row["created_at"] > TTL_SECONDS:
+        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        return None
+    conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+    return row["value"]
+
+
+def put(key, value, path=CACHE_PATH):
+    conn = _conn(path)
+    now = time.time()
+    conn.execute(
+        "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) "
+        "VALUES (?, ?, ?, ?)",
+        (key, value, now, now),
+    )
+    conn.execute(
+        "DELETE FROM llm_cache WHERE key IN ("
+        "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+        (MAX_ENTRIES,),
+    )
+
+
+def cached_completion(model, prompt, create, **params):
+    """
+    Return the cached completion for this exact request, or call
+    create(model=..., prompt=..., **params) and cache what it returns.
+    Exceptions from create propagate and nothing is cached.
+    """
+    key = make_key(model, prompt, **params)
+    value = get(key)
+    if value is not None:
+        metrics.LLM_CACHE.inc(result="hit")
+        return value
+
+    metrics.LLM_CACHE.inc(result="miss")
+    with metrics.LLM_REQUEST_SECONDS.time(model=model, outcome="ok"):
+        value = create(model=model, prompt=prompt, **params)
+    put(key, value)
+    return value
@@ -0,0 +1,318 @@
+import bisect
+import glob
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===============================
+# METRICS REGISTRY
+# ===============================
+# Process-wide counters, gauges and histograms in Prometheus text format
+# (version 0.0.4). Modules record into them where the work happens (SQLite
+# WAL and checkpoint bytes per database file in db.transaction, JSON
+# reads, LLM requests and cache lookups, exports, page runs); data file
+# sizes and process I/O are read when the metrics are rendered.
+#
+# Exposed through whichever of these is configured, started by the first
+# page view of the process:
+#   ECOVERSE_METRICS_PORT   sidecar HTTP endpoint on 127.0.0.1:<port>/metrics
+#   ECOVERSE_METRICS_FILE   file rewritten atomically every WRITE_INTERVAL s
+#                           (e.g. for node_exporter's textfile collector)
+
+METRICS_PORT = os.environ.get("ECOVERSE_METRICS_PORT")
+METRICS_FILE = os.environ.get("ECOVERSE_METRICS_FILE")
+WRITE_INTERVAL = 15
+ACTIVE_SESSION_SECONDS = 300
+DATA_FILES = "data/*"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = {}
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._lines(key, value))
+        return lines
+
+    def _lines(self, key, value):
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def _lines(self, key, value):
+        counts, total, summed = value
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f"{self.name}_bucket"
+                         f"{_labels(self.label_names, key, [('le', _number(bound))])} "
+                         f"{cumulative}")
+        lines.append(f"{self.name}_bucket"
+                     f"{_labels(self.label_names, key, [('le', '+Inf')])} {total}")
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(summed)}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {total}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and "outcome" in self.histogram.label_names:
+            self.labels = dict(self.labels, outcome="error")
+        self.histogram.observe(time.perf_counter() - self._started, **self.labels)
+        return False
+
+
+def _register(metric):
+    with _lock:
+        return _registry.setdefault(metric.name, metric)
+
+
+def counter(name, help_text, labels=()):
+    return _register(Counter(name, help_text, labels))
+
+
+def gauge(name, help_text, labels=()):
+    return _register(Gauge(name, help_text, labels))
+
+
+def histogram(name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, help_text, labels, buckets))
+
+
+# ===============================
+# APP METRICS
+# ===============================
+SQLITE_WAL_BYTES = counter(
+    "ecoverse_sqlite_wal_write_bytes_total",
+    "Bytes of WAL frames written by this process's transactions.", ["file"])
+SQLITE_CHECKPOINT_BYTES = counter(
+    "ecoverse_sqlite_checkpoint_bytes_total",
+    "Bytes of WAL frames checkpointed into the database file.", ["file"])
+SQLITE_WAL_RESETS = counter(
+    "ecoverse_sqlite_wal_resets_total",
+    "Times the WAL restarted from its first frame after a full checkpoint.", ["file"])
+FILE_READ_BYTES = counter(
+    "ecoverse_file_read_bytes_total",
+    "Bytes read from JSON / JSONL data files (rules, legacy import).", ["file"])
+FILE_WRITE_BYTES = counter(
+    "ecoverse_file_write_bytes_total", "Bytes written to export files.", ["file"])
+JSON_PARSE_SECONDS = histogram(
+    "ecoverse_json_parse_seconds", "Time to parse a JSON data file.", ["file"])
+JSON_CACHE = counter(
+    "ecoverse_json_cache_requests_total", "Shared JSON loader lookups.", ["result"])
+LLM_REQUEST_SECONDS = histogram(
+    "ecoverse_llm_request_seconds", "OpenAI request latency.", ["model", "outcome"])
+LLM_CACHE = counter(
+    "ecoverse_llm_cache_requests_total", "LLM response cache lookups.", ["result"])
+PAGE_RUNS = counter(
+    "ecoverse_page_runs_total", "Script runs (first loads and reruns) per page.", ["page"])
+ACTIVE_SESSIONS = gauge(
+    "ecoverse_active_sessions",
+    f"Browser sessions with a page run in the last {ACTIVE_SESSION_SECONDS} s.")
+DATA_FILE_BYTES = gauge(
+    "ecoverse_data_file_bytes", "Current size of each data file.", ["file"])
+PROCESS_IO_BYTES = gauge(
+    "ecoverse_process_io_bytes",
+    "Bytes this process has read from / written to storage (Linux /proc).",
+    ["direction"])
+
+_sessions = {}
+
+
+def file_label(path):
+    return os.path.basename(path)
+
+
+def page_view(page, session_state):
+    """
+    Count one run of `page` for the session whose st.session_state is
+    given, and start the exporter on the first call in the process.
+    """
+    session_id = session_state.get("_metrics_session")
+    if session_id is None:
+        session_id = session_state["_metrics_session"] = os.urandom(8).hex()
+    PAGE_RUNS.inc(page=page)
+    with _lock:
+        _sessions[session_id] = time.time()
+    start()
+
+
+def _collect():
+    now = time.time()
+    with _lock:
+        for sid, seen in list(_sessions.items()):
+            if now - seen > ACTIVE_SESSION_SECONDS:
+                del _sessions[sid]
+        ACTIVE_SESSIONS.set(len(_sessions))
+
+    for path in glob.glob(DATA_FILES):
+        if os.path.isfile(path):
+            try:
+                DATA_FILE_BYTES.set(os.path.getsize(path), file=file_label(path))
+            except OSError:
+                pass
+
+    try:
+        with open("/proc/self/io") as f:
+            io = dict(line.split(": ") for line in f.read().splitlines())
+        PROCESS_IO_BYTES.set(int(io["read_bytes"]), direction="read")
+        PROCESS_IO_BYTES.set(int(io["write_bytes"]), direction="write")
+    except (OSError, KeyError, ValueError):
+        pass
+
+
+def render():
+    """All metrics in Prometheus text exposition format."""
+    _collect()
+    with _lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+# ===============================
+# EXPORTERS
+# ===============================
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_started = False
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, int(port)), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name="ecoverse-metrics-http").start()
+    return server
+
+
+def _write_loop(path, interval):
+    while True:
+        try:
+            write_file(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+def start(port=METRICS_PORT, path=METRICS_FILE):
+    """Start the configured exporters once per process."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    if port:
+        try:
+            serve(port)
+        except OSError as exc:
+            print(f"metrics: cannot listen on port {port}: {exc}", file=sys.stderr)
+    if path:
+        threading.Thread(target=_write_loop, args=(path, WRITE_INTERVAL), daemon=True,
+                         name="ecoverse-metrics-file").start()
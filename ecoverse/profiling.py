@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ===============================
+# SECTION TIMINGS
+# ===============================
+# Pages call `prof = profiling.timer("Page")` at the top and
+# `prof.lap("Section")` at the end of each section: a lap records the
+# time since the previous one. Samples from every session go into one
+# process-wide ring buffer per (page, section), from which the admin
+# Performance panel reads percentiles.
+#
+# Off by default (ECOVERSE_PROFILE=1 or the panel's toggle turns it on).
+# While off, timer() hands out a shared no-op, so an instrumented page
+# pays one attribute lookup and call per lap.
+
+MAX_SAMPLES = 1000
+PERCENTILES = (50, 90, 99)
+
+_enabled = os.environ.get("ECOVERSE_PROFILE", "") not in ("", "0")
+_samples = {}
+_lock = threading.Lock()
+
+
+class _NullTimer:
+    def lap(self, section):
+        pass
+
+
+_NULL = _NullTimer()
+
+
+class PageTimer:
+    def __init__(self, page):
+        self.page = page
+        self._last = time.perf_counter()
+
+    def lap(self, section):
+        now = time.perf_counter()
+        record(self.page, section, (now - self._last) * 1000)
+        self._last = now
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def timer(page):
+    return PageTimer(page) if _enabled else _NULL
+
+
+def record(page, section, ms):
+    key = (page, section)
+    with _lock:
+        buf = _samples.get(key)
+        if buf is None:
+            buf = _samples[key] = deque(maxlen=MAX_SAMPLES)
+        buf.append(ms)
+
+
+def summary():
+    """One row per (page, section): samples, mean and PERCENTILES in ms."""
+    with _lock:
+        snapshot = {key: list(buf) for key, buf in _samples.items()}
+
+    rows = []
+    for (page, section), values in snapshot.items():
+        arr = np.asarray(values)
+        row = {"page": page, "section": section, "samples": len(arr),
+               "mean_ms": round(float(arr.mean()), 2)}
+        for p, v in zip(PERCENTILES, np.percentile(arr, PERCENTILES)):
+            row[f"p{p}_ms"] = round(float(v), 2)
+        rows.append(row)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
@@ -0,0 +1,150 @@
+import threading
+from collections import Counter
+
+from ecoverse import db, ledger
+
+# ===============================
+# REWARDS CATALOG & REDEMPTION
+# ===============================
+# The catalog (names, costs, approval flags) changes rarely, so each
+# process caches it per database and re-reads it only when the rewards
+# table's version counter (rewards_state, bumped by triggers) moves.
+# Stock changes on every redemption and is read live from reward_stock;
+# a reward with no stock row is unlimited.
+#
+# redeem() runs inside the caller's db.transaction(conn). BEGIN IMMEDIATE
+# holds the write lock, so the balance and stock checks cannot go stale
+# before the writes: concurrent redemptions queue on busy_timeout rather
+# than oversell, and each holds the lock for a handful of statements.
+
+REDEEMED = "redeemed"
+DUPLICATE = "duplicate"
+OUT_OF_STOCK = "out_of_stock"
+INSUFFICIENT_POINTS = "insufficient_points"
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def version(conn):
+    return conn.execute("SELECT version FROM rewards_state WHERE id = 1").fetchone()[0]
+
+
+def catalog(conn):
+    """All rewards, cheapest first. Shared between sessions: treat as read-only."""
+    path, current = db.db_path(conn), version(conn)
+    cached = _catalogs.get(path)
+    if cached is not None and cached[0] == current:
+        return cached[1]
+
+    rewards = [dict(r) for r in conn.execute(
+        "SELECT * FROM rewards ORDER BY points_required, id"
+    )]
+    for r in rewards:
+        r["approved"] = bool(r["approved"])
+    with _lock:
+        _catalogs[path] = (current, rewards)
+    return rewards
+
+
+def stock(conn):
+    """{reward_id: remaining} for stock-limited rewards."""
+    return dict(conn.execute("SELECT reward_id, remaining FROM reward_stock"))
+
+
+def set_stock(conn, reward_id, remaining):
+    """Limit a reward to `remaining` units, or lift the limit with None."""
+    if remaining is None:
+        conn.execute("DELETE FROM reward_stock WHERE reward_id = ?", (reward_id,))
+    else:
+        conn.execute(
+            "INSERT OR REPLACE INTO reward_stock (reward_id, remaining) VALUES (?, ?)",
+            (reward_id, int(remaining)),
+        )
+
+
+def redeem(conn, user_id, reward, key, timestamp):
+    """
+    Check the balance and stock, take one unit, record the redemption and
+    debit its cost. `key` is the redemption's idempotency key. Returns
+    REDEEMED or the reason nothing was written.
+    """
+    # A replayed key is reported as such, whatever the balance is now
+    key = f"redemption:{key}"
+    if db.claimed(conn, key):
+        return DUPLICATE
+
+    cost = reward["points_required"]
+    if ledger.balance(conn, user_id) < cost:
+        return INSUFFICIENT_POINTS
+
+    row = conn.execute(
+        "SELECT remaining FROM reward_stock WHERE reward_id = ?", (reward["id"],)
+    ).fetchone()
+    if row is not None and row[0] <= 0:
+        return OUT_OF_STOCK
+
+    db.claim(conn, key)
+
+    if row is not None:
+        conn.execute(
+            "UPDATE reward_stock SET remaining = remaining - 1 WHERE reward_id = ?",
+            (reward["id"],),
+        )
+    txn_id = db.insert_transaction(conn, {
+        "user": user_id,
+        "type": "redemption",
+        "reward": reward["name"],
+        "reward_id": reward["id"],
+        "points_spent": cost,
+        "timestamp": timestamp,
+        "status": "approved" if reward["approved"] else "pending",
+    })
+    ledger.debit(conn, user_id, cost, txn_id)
+    return REDEEMED
+
+
+def restock(conn, reward_id, units=1):
+    """Return rejected redemptions' units of a reward to stock."""
+    conn.execute(
+        "UPDATE reward_stock SET remaining = remaining + ? WHERE reward_id = ?",
+        (units, reward_id),
+    )
+
+
+def review(conn, txn_ids, approve):
+    """
+    Approve or reject pending redemptions in one batch, inside the
+    caller's db.transaction(conn). Rejections refund their points and
+    stock. Requests that are no longer pending (another admin got there
+    first) are skipped. Returns the ids that were changed.
+    """
+    status = "approved" if approve else "rejected"
+    rows = []
+    ids = list(txn_ids)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        # +status: look the ids up by primary key, not by walking every
+        # pending row in idx_txn_status_ts
+        rows += conn.execute(
+            "SELECT id, user, reward_id, points_spent FROM transactions "
+            f"WHERE +status = 'pending' AND id IN ({', '.join('?' for _ in chunk)})",
+            chunk,
+        ).fetchall()
+    if not rows:
+        return []
+
+    # Rows were read as pending under the write lock, so none can be
+    # decided (or refunded) twice
+    conn.executemany(
+        "UPDATE transactions SET status = ? WHERE id = ? AND status = 'pending'",
+        [(status, r["id"]) for r in rows],
+    )
+    if not approve:
+        ledger.post_many(conn, [
+            (r["user"], "refund", r["points_spent"], r["id"]) for r in rows
+        ])
+        for reward_id, units in Counter(r["reward_id"] for r in rows).items():
+            if reward_id is not None:
+                restock(conn, reward_id, units)
+    return [r["id"] for r in rows]
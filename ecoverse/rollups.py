@@ -0,0 +1,93 @@
+# ===============================
+# TRANSACTION ROLLUPS
+# ===============================
+# Per-day and per-status transaction counters kept current by triggers on
+# the transactions table, so every insert, status change and delete
+# adjusts them in the writer's own transaction. Charts read the counters
+# instead of scanning transactions: O(days shown), not O(history).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS txn_daily (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS txn_status (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_txn_rollup_insert
+AFTER INSERT ON transactions
+BEGIN
+    INSERT INTO txn_daily (day, count) VALUES (substr(NEW.timestamp, 1, 10), 1)
+        ON CONFLICT(day) DO UPDATE SET count = count + 1;
+    INSERT INTO txn_status (status, count)
+        SELECT NEW.status, 1 WHERE NEW.status IS NOT NULL
+        ON CONFLICT(status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_txn_rollup_status
+AFTER UPDATE OF status ON transactions
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE txn_status SET count = count - 1 WHERE status = OLD.status;
+    INSERT INTO txn_status (status, count)
+        SELECT NEW.status, 1 WHERE NEW.status IS NOT NULL
+        ON CONFLICT(status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_txn_rollup_delete
+AFTER DELETE ON transactions
+BEGIN
+    UPDATE txn_daily SET count = count - 1 WHERE day = substr(OLD.timestamp, 1, 10);
+    UPDATE txn_status SET count = count - 1 WHERE status = OLD.status;
+END;
+"""
+
+
+def exists(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'txn_daily'"
+    ).fetchone() is not None
+
+
+def rebuild(conn):
+    """Recount from the transactions table (first run on an older database)."""
+    conn.execute("DELETE FROM txn_daily")
+    conn.execute("DELETE FROM txn_status")
+    conn.execute(
+        "INSERT INTO txn_daily (day, count) "
+        "SELECT substr(timestamp, 1, 10), COUNT(*) FROM transactions GROUP BY 1"
+    )
+    conn.execute(
+        "INSERT INTO txn_status (status, count) "
+        "SELECT status, COUNT(*) FROM transactions "
+        "WHERE status IS NOT NULL GROUP BY status"
+    )
+
+
+def daily_counts(conn, since=None):
+    """[(day, count)] in date order; `since` is an ISO date."""
+    if since is None:
+        cur = conn.execute(
+            "SELECT day, count FROM txn_daily WHERE count > 0 ORDER BY day"
+        )
+    else:
+        cur = conn.execute(
+            "SELECT day, count FROM txn_daily WHERE count > 0 AND day >= ? "
+            "ORDER BY day",
+            (since,),
+        )
+    return cur.fetchall()
+
+
+def status_counts(conn):
+    return conn.execute(
+        "SELECT status, count FROM txn_status WHERE count > 0 "
+        "ORDER BY count DESC, status"
+    ).fetchall()
+
+
+def total(conn):
+    return conn.execute("SELECT COALESCE(SUM(count), 0) FROM txn_daily").fetchone()[0]
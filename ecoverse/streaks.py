@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+from ecoverse import badges
+
+# ===============================
+# GREEN STREAKS
+# ===============================
+# Per-user streak state (first and last day of the latest run of
+# consecutive logged days), updated when carbon entries are written so a
+# page view only reads one row. Streak badges (see badges.py) are
+# evaluated at that moment.
+#
+# The streak shown to the user is the run ending today; a run that ended
+# earlier counts as 0, matching the original page.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS streaks (
+    user TEXT PRIMARY KEY,
+    start_date TEXT NOT NULL,
+    last_date TEXT NOT NULL
+);
+"""
+
+def exists(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'streaks'"
+    ).fetchone() is not None
+
+
+def _state(conn, user_id):
+    row = conn.execute(
+        "SELECT start_date, last_date FROM streaks WHERE user = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+
+def _save(conn, user_id, start, last, previous=0):
+    conn.execute(
+        "INSERT OR REPLACE INTO streaks (user, start_date, last_date) VALUES (?, ?, ?)",
+        (user_id, start.isoformat(), last.isoformat()),
+    )
+    length = (last - start).days + 1
+    badges.on_change(conn, "streak", user_id, previous, length)
+    return length
+
+
+def _logged(conn, user_id, day):
+    return conn.execute(
+        "SELECT 1 FROM carbon_records WHERE user = ? AND date = ? LIMIT 1",
+        (user_id, day.isoformat()),
+    ).fetchone() is not None
+
+
+def refresh(conn, user_id):
+    """
+    Rebuild one user's state from their records: O(length of the latest
+    run) index lookups. Used for backfills and out-of-order writes.
+    """
+    row = conn.execute(
+        "SELECT MAX(date) FROM carbon_records WHERE user = ?", (user_id,)
+    ).fetchone()
+    if row[0] is None:
+        conn.execute("DELETE FROM streaks WHERE user = ?", (user_id,))
+        return 0
+    last = date.fromisoformat(row[0])
+    start = last
+    while _logged(conn, user_id, start - timedelta(days=1)):
+        start -= timedelta(days=1)
+    return _save(conn, user_id, start, last)
+
+
+def record_activity(conn, user_id, day):
+    """
+    Update the streak for a carbon entry logged on `day` (after the
+    record is inserted, inside the same transaction). O(1) for entries
+    on or after the user's last logged day. Returns the run length.
+    """
+    state = _state(conn, user_id)
+    if state is None:
+        return _save(conn, user_id, day, day)
+
+    start, last = state
+    if start <= day <= last:
+        return (last - start).days + 1
+    if day == last + timedelta(days=1):
+        return _save(conn, user_id, start, day, (last - start).days + 1)
+    if day > last:
+        return _save(conn, user_id, day, day)
+    return refresh(conn, user_id)
+
+
+def current(conn, user_id, today=None):
+    """Length of the run ending today (0 if the user has not logged today)."""
+    today = today or date.today()
+    state = _state(conn, user_id)
+    if state is None or state[1] != today:
+        return 0
+    return (state[1] - state[0]).days + 1
+
+
+def rebuild(conn):
+    """Recompute every user's state (first run on an older database)."""
+    users = [r[0] for r in conn.execute("SELECT DISTINCT user FROM carbon_records")]
+    for user_id in users:
+        refresh(conn, user_id)
@@ -0,0 +1,254 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ecoverse import badges, bulk_import, db, leaderboard, ledger, rewards
+
+# ===============================
+# SYNTHETIC DATASETS
+# ===============================
+# Builds a realistic campus database for benchmarks and load tests:
+# activity per user is heavy-tailed (a few very active students, a long
+# tail of occasional ones), carbon entries cover the last DAYS days with
+# plausible travel / electricity mixes, waste uploads follow the
+# classifier's categories, and redemptions draw from a generated catalog
+# with pending / approved / rejected outcomes. Everything goes through the
+# same write paths as the app (bulk import for carbon entries, ledger
+# postings for points, rewards.redeem / review for redemptions), so
+# balances never go negative, stock is honoured, and rollups, streaks and
+# badges are consistent.
+#
+# The default sizes are the "full" campus; bench.py scales them down.
+
+FULL = {"users": 10_000, "transactions": 1_000_000, "carbon": 500_000, "rewards": 25}
+DAYS = 180
+CHUNK_ROWS = 50_000
+
+TRAVEL_MIX = {"Car": 0.25, "Bus": 0.3, "Train": 0.1, "Bike": 0.15, "Walk": 0.2}
+TYPICAL_KM = {"Car": 18.0, "Bus": 9.0, "Train": 25.0, "Bike": 5.0, "Walk": 2.0}
+
+# Mirrors the User Dashboard's points per category
+WASTE_POINTS = {
+    "Recyclable (Plastic)": 15,
+    "Recyclable (Paper)": 10,
+    "Organic Waste": 5,
+    "E-Waste": 25,
+    "Landfill Waste": 1,
+}
+WASTE_MIX = [0.32, 0.25, 0.28, 0.05, 0.10]
+
+REDEMPTION_SHARE = 0.08
+REVIEW_OUTCOMES = {"approved": 0.7, "rejected": 0.1, "pending": 0.2}
+
+REWARD_NAMES = [
+    "Reusable Bottle", "Canteen Coupon", "Bamboo Toothbrush", "Tote Bag",
+    "Plant a Tree", "Library Late-Fee Waiver", "Bike Tune-Up", "Coffee Mug",
+    "Solar Power Bank", "Eco T-Shirt", "Notebook (Recycled)", "Metal Straw Set",
+]
+
+
+def scaled(scale):
+    """FULL sizes times `scale`; the rewards catalog keeps its size."""
+    return {k: v if k == "rewards" else max(1, int(v * scale)) for k, v in FULL.items()}
+
+
+def _user_ids(n):
+    return np.array([f"student_{i:05d}" for i in range(n)], dtype=object)
+
+
+def _activity_weights(rng, n):
+    # Pareto-like: the busiest students log far more than the median one
+    w = rng.pareto(1.5, n) + 1.0
+    return w / w.sum()
+
+
+def _timestamps(rng, n, end):
+    start = end - pd.Timedelta(days=DAYS)
+    seconds = np.sort(rng.integers(0, DAYS * 86400, n))
+    return start + pd.to_timedelta(seconds, unit="s")
+
+
+def make_rewards(rng, n):
+    rows = []
+    for i in range(n):
+        name = REWARD_NAMES[i % len(REWARD_NAMES)]
+        if i >= len(REWARD_NAMES):
+            name = f"{name} #{i // len(REWARD_NAMES) + 1}"
+        rows.append({
+            "id": i + 1,
+            "name": name,
+            "type": "Campus" if i % 3 else "Merch",
+            "points_required": int(rng.choice([50, 100, 150, 250, 400, 600, 1000])),
+            "description": f"Synthetic reward {i + 1}",
+            "approved": int(rng.random() < 0.6),
+            "stock": int(rng.integers(5, 500)) if rng.random() < 0.4 else None,
+        })
+    return rows
+
+
+def make_activities(rng, users, weights, n, end):
+    """n carbon activities as the bulk importer's typed DataFrame."""
+    modes = rng.choice(list(TRAVEL_MIX), n, p=list(TRAVEL_MIX.values()))
+    km = np.array([TYPICAL_KM[m] for m in modes]) * rng.gamma(2.0, 0.5, n)
+    when = _timestamps(rng, n, end).normalize() + pd.to_timedelta(
+        rng.integers(7 * 3600, 22 * 3600, n), unit="s"
+    )
+    return pd.DataFrame({
+        "user": rng.choice(users, n, p=weights),
+        "date": when,
+        "travel_mode": modes,
+        "km": km.round(1),
+        "electricity": rng.gamma(2.0, 1.5, n).round(1),
+        "lifestyle": rng.beta(2.0, 5.0, n).round(2),
+    })
+
+
+def _write_uploads(conn, rng, users, weights, n, end):
+    categories = list(WASTE_POINTS)
+    picked = rng.choice(len(categories), n, p=WASTE_MIX)
+    who = rng.choice(users, n, p=weights).tolist()
+    stamps = _timestamps(rng, n, end).strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    txns = [
+        {"user": u, "type": "waste_upload", "category": categories[c],
+         "points": WASTE_POINTS[categories[c]], "timestamp": ts}
+        for u, c, ts in zip(who, picked.tolist(), stamps)
+    ]
+    with db.transaction(conn):
+        ids = db.insert_transactions(conn, txns)
+        ledger.post_many(conn, (
+            (t["user"], "credit", t["points"], i) for t, i in zip(txns, ids)
+        ))
+
+
+def _write_redemptions(conn, rng, users, weights, catalog, n, end, key_prefix):
+    """
+    Redeem through rewards.redeem, so balance and stock rules hold (users
+    who cannot afford a reward, or find it sold out, are skipped), then
+    settle requests that need approval through rewards.review. Returns
+    the number of redemptions made.
+    """
+    picked = rng.integers(0, len(catalog), n).tolist()
+    who = rng.choice(users, n, p=weights).tolist()
+    stamps = _timestamps(rng, n, end).strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    made = 0
+    with db.transaction(conn):
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+        for i, (u, r, ts) in enumerate(zip(who, picked, stamps)):
+            outcome = rewards.redeem(conn, u, catalog[r], f"{key_prefix}:{i}", ts)
+            made += outcome == rewards.REDEEMED
+
+        pending = [row[0] for row in conn.execute(
+            "SELECT id FROM transactions INDEXED BY idx_txn_pending "
+            "WHERE status = 'pending' AND id > ? ORDER BY id",
+            (first_id,),
+        )]
+        decisions = rng.choice(list(REVIEW_OUTCOMES), len(pending),
+                               p=list(REVIEW_OUTCOMES.values())).tolist()
+        for status in ("approved", "rejected"):
+            rewards.review(conn, [t for t, d in zip(pending, decisions) if d == status],
+                           approve=status == "approved")
+    return made
+
+
+def generate(path, users=FULL["users"], transactions=FULL["transactions"],
+             carbon=FULL["carbon"], n_rewards=FULL["rewards"], seed=42,
+             chunk_rows=CHUNK_ROWS, on_progress=None):
+    """
+    Create a synthetic database at `path` (which must not exist yet).
+    `transactions` counts every transaction, including the one each
+    carbon entry creates; redemption attempts a user cannot afford (or
+    that find the reward sold out) are dropped, so slightly fewer are
+    written. Returns {table: rows, "seconds": elapsed}.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+
+    conn = db.connect(path)
+    db.create_schema(conn)
+
+    ids = _user_ids(users)
+    weights = _activity_weights(rng, users)
+    catalog = make_rewards(rng, n_rewards)
+    with db.transaction(conn):
+        conn.executemany(
+            "INSERT INTO users (id, name, points) VALUES (?, ?, 0)",
+            [(u, u.replace("_", " ").title()) for u in ids.tolist()],
+        )
+        conn.executemany(
+            "INSERT INTO rewards (id, name, type, points_required, description, approved) "
+            "VALUES (:id, :name, :type, :points_required, :description, :approved)",
+            catalog,
+        )
+        for r in catalog:
+            if r["stock"] is not None:
+                rewards.set_stock(conn, r["id"], r["stock"])
+        ledger.bootstrap(conn)
+
+    carbon = min(carbon, transactions)
+    other = transactions - carbon
+    n_redemptions = int(other * REDEMPTION_SHARE)
+    plan = [("carbon", carbon), ("uploads", other - n_redemptions),
+            ("redemptions", n_redemptions)]
+
+    redeemed = 0
+    for kind, total in plan:
+        for start in range(0, total, chunk_rows):
+            n = min(chunk_rows, total - start)
+            if kind == "carbon":
+                bulk_import.write_chunk(conn, make_activities(rng, ids, weights, n, end))
+            elif kind == "uploads":
+                _write_uploads(conn, rng, ids, weights, n, end)
+            else:
+                redeemed += _write_redemptions(conn, rng, ids, weights, catalog, n, end,
+                                               f"synthetic:{seed}:{start}")
+            if on_progress:
+                on_progress(kind, start + n, total)
+
+    with db.transaction(conn):
+        badges.recompute(conn)
+    conn.close()
+    leaderboard.invalidate()
+
+    return {
+        "users": users,
+        "transactions": transactions - n_redemptions + redeemed,
+        "carbon_records": carbon,
+        "redemptions": redeemed,
+        "rewards": n_rewards,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m ecoverse.synthetic",
+        description="Generate a synthetic EcoVerse database.",
+    )
+    parser.add_argument("path", help="new SQLite file to create")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the full campus sizes (default 1.0)")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--transactions", type=int)
+    parser.add_argument("--carbon", type=int)
+    parser.add_argument("--rewards", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = scaled(args.scale)
+    for key in ("users", "transactions", "carbon", "rewards"):
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    def progress(kind, done, total):
+        print(f"\r{kind}: {done:,}/{total:,}", end="\n" if done == total else "", flush=True)
+
+    report = generate(args.path, sizes["users"], sizes["transactions"], sizes["carbon"],
+                      sizes["rewards"], seed=args.seed, on_progress=progress)
+    print(", ".join(f"{k}={v:,}" if isinstance(v, int) else f"{k}={v}"
+                    for k, v in report.items()))
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+# ===============================
+# SHARED WORKER POOL
+# ===============================
+# One thread pool for the whole process, used to run slow network calls
+# (LLM requests) off the page's render path. Jobs must not touch
+# st.* APIs; they return plain values that the page renders.
+
+MAX_WORKERS = 8
+
+_pool = None
+_lock = threading.Lock()
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="ecoverse-worker"
+                )
+    return _pool
+
+
+def submit(fn, *args, **kwargs):
+    return pool().submit(fn, *args, **kwargs)
+
+
+def as_finished(jobs, timeout):
+    """
+    Yield (name, result, error) for each {future: name} job as it
+    finishes. Jobs still running after `timeout` seconds are yielded with
+    a TimeoutError so the caller can render a fallback; they keep running
+    in the pool and are simply ignored.
+    """
+    pending = dict(jobs)
+    try:
+        for future in as_completed(list(pending), timeout=timeout):
+            name = pending.pop(future)
+            try:
+                yield name, future.result(), None
+            except Exception as exc:
+                yield name, None, exc
+    except FuturesTimeout:
+        for name in pending.values():
+            yield name, None, TimeoutError(f"{name} timed out after {timeout}s")
@@ -13,23 +13,10 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 
-
-def load_json(path, default):
-    if not os.path.exists(path):
-        return default
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-from PIL import Image
-import random
-import json
-import os
 from datetime import datetime
 
+from ecoverse import badges, classifier, db, dedupe, images, ledger, metrics, profiling
+
 # -----------------------------
 # CONSTANTS
 # -----------------------------
@@ -43,53 +30,13 @@ CARBON_POINTS_RULES = {
     "Landfill Waste": 1
 }
 
-USERS_FILE = "data/users.json"
-TRANSACTIONS_FILE = "data/transactions.json"
-
-# -----------------------------
-# HELPER FUNCTIONS
-# -----------------------------
-
-def load_json(path, default):
-    if not os.path.exists(path):
-        return default
-
-    try:
-        with open(path, "r") as f:
-            content = f.read().strip()
-            if not content:
-                return default
-            return json.loads(content)
-    except json.JSONDecodeError:
-        return default
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
 # -----------------------------
-# LOAD DATA (DEMO SAFE)
-# -----------------------------
-
-DATA_FILE = "data/demo_data.json" if st.session_state.DEMO_MODE else USERS_FILE
-
-users = load_json(DATA_FILE, {})
-transactions = load_json(TRANSACTIONS_FILE, [])
-
-if USER_ID not in users:
-    users[USER_ID] = {"name": "Demo User", "points": 0}
-
-# Persist only in LIVE mode
-if not st.session_state.DEMO_MODE:
-    save_json(USERS_FILE, users)
-
+# LOAD DATA
 # -----------------------------
-users = load_json(USERS_FILE, {})
-transactions = load_json(TRANSACTIONS_FILE, [])
-
-if USER_ID not in users:
-    users[USER_ID] = {"name": "Demo User", "points": 0}
-    save_json(USERS_FILE, users)
+metrics.page_view("User Dashboard", st.session_state)
+prof = profiling.timer("User Dashboard")
+conn = db.get_conn()
+prof.lap("Data load")
 
 # -----------------------------
 # UI START
@@ -113,47 +60,85 @@ if uploaded_file is None:
     st.info("Please upload an image to continue.")
     st.stop()
 
-image = Image.open(uploaded_file)
-st.image(image, caption="Uploaded Image", use_column_width=True)
-
-# -----------------------------
-# CLASSIFICATION (DEMO SAFE)
-# -----------------------------
-categories = list(CARBON_POINTS_RULES.keys())
+try:
+    upload = images.ingest(uploaded_file)
+except images.ImageRejected as exc:
+    st.error(f"❌ {exc}")
+    st.stop()
 
-if demo_mode:
-    category = random.choice(categories)
-    confidence = round(random.uniform(0.75, 0.95), 2)
+st.image(upload["thumbnail"], caption="Uploaded Image")
+prof.lap("Image ingest")
+
+# -----------------------------
+# DEDUPLICATION + CLASSIFICATION (LOCAL CPU MODEL)
+# -----------------------------
+# Known uploads are answered from the dedupe index: no re-classification
+# on reruns and no second award for the same (or a near-identical) photo.
+# A near match needs both the perceptual hash and the colour to agree.
+sha256 = dedupe.content_hash(uploaded_file.getvalue())
+known = dedupe.find_exact(conn, sha256)
+phash = colour = None
+if known is None:
+    phash = dedupe.perceptual_hash(upload["image"])
+    colour = dedupe.mean_colour(upload["image"])
+    known = dedupe.find_similar(conn, phash, colour)
+
+if known is not None:
+    category = known["category"]
+    confidence = known["confidence"]
+    # This session's own upload, re-rendered by a rerun, is not a duplicate
+    duplicate = st.session_state.get("awarded_upload") != known["sha256"]
+    if phash is not None:
+        with db.transaction(conn):
+            dedupe.record(conn, sha256, phash, colour, USER_ID, category, confidence)
 else:
-    category = random.choice(categories)
-    confidence = 0.90  # Safe fallback
+    result = classifier.classify_one(upload["image"])
+    category = result["category"]
+    confidence = result["confidence"]
+    duplicate = False
 
 st.success("Classification Completed")
 st.write(f"**Category:** {category}")
 st.write(f"**Confidence:** {confidence * 100:.0f}%")
+if known is None:
+    st.caption(f"Classified locally in {result['latency_ms']:.1f} ms")
+
+prof.lap("Classification")
 
 # -----------------------------
 # POINTS CALCULATION
 # -----------------------------
-points_earned = CARBON_POINTS_RULES.get(category, 0)
+points_earned = 0 if duplicate else CARBON_POINTS_RULES.get(category, 0)
 
 st.markdown("### Carbon Points Earned")
 st.write(f"**+{points_earned} points**")
+if duplicate:
+    st.warning("♻️ This image (or a near-identical one) was already submitted — no new points.")
 
 # -----------------------------
 # UPDATE USER DATA
 # -----------------------------
-users[USER_ID]["points"] += points_earned
-
-transactions.append({
-    "user": USER_ID,
-    "category": category,
-    "points": points_earned,
-    "timestamp": datetime.now().isoformat()
-})
-
-save_json(USERS_FILE, users)
-save_json(TRANSACTIONS_FILE, transactions)
+if known is None:
+    with db.transaction(conn):
+        # record() loses if another session stored the same bytes first
+        awarded = db.claim(conn, f"waste_upload:{sha256}") and \
+            dedupe.record(conn, sha256, phash, colour, USER_ID, category, confidence)
+        if awarded:
+            db.ensure_user(conn, USER_ID, "Demo User")
+            txn_id = db.insert_transaction(conn, {
+                "user": USER_ID,
+                "type": "waste_upload",
+                "category": category,
+                "points": points_earned,
+                "timestamp": datetime.now().isoformat()
+            })
+            ledger.credit(conn, USER_ID, points_earned, txn_id)
+            dedupe.set_txn(conn, sha256, txn_id)
+    if awarded:
+        st.session_state.awarded_upload = sha256
+
+user = db.get_user(conn, USER_ID, "Demo User")
+prof.lap("Points update")
 
 # -----------------------------
 # DISPLAY USER BALANCE
@@ -165,7 +150,7 @@ st.caption("Your personal environmental contribution")
 
 st.metric(
     label="Total Carbon Points",
-    value=users[USER_ID]["points"],
+    value=user["points"],
     delta="+Eco Impact"
 )
 
@@ -175,7 +160,7 @@ st.metric(
 
 GOAL_POINTS = 500  # Demo-friendly goal
 
-current_points = users[USER_ID]["points"]
+current_points = user["points"]
 
 progress = min(current_points / GOAL_POINTS, 1.0)
 
@@ -189,48 +174,31 @@ st.caption(f"🎯 Goal: {GOAL_POINTS} eco-points for Green Badge")
 # ==============================
 st.markdown("### 🏅 Your Sustainability Badges")
 
-points = users[USER_ID]["points"]
-
-badge_col1, badge_col2, badge_col3 = st.columns(3)
+earned = set(db.user_badges(conn, USER_ID))
+point_badges = badges.get_rules().rules("points")
 
-def badge_card(title, icon, unlocked, requirement):
+def badge_card(title, unlocked, requirement):
     if unlocked:
-        st.success(f"{icon} **{title}**\n\n✅ Unlocked ({requirement}+ points)")
+        st.success(f"**{title}**\n\n✅ Unlocked ({requirement}+ points)")
     else:
-        st.info(f"{icon} **{title}**\n\n🔒 Locked ({requirement} points needed)")
-
-with badge_col1:
-    badge_card(
-        title="Beginner",
-        icon="🌱",
-        unlocked=points >= 100,
-        requirement=100
-    )
+        st.info(f"**{title}**\n\n🔒 Locked ({requirement} points needed)")
 
-with badge_col2:
-    badge_card(
-        title="Green Contributor",
-        icon="🌿",
-        unlocked=points >= 300,
-        requirement=300
-    )
+for col, (name, threshold) in zip(st.columns(len(point_badges) or 1), point_badges):
+    with col:
+        badge_card(
+            title=name,
+            unlocked=name in earned,
+            requirement=threshold
+        )
 
-with badge_col3:
-    badge_card(
-        title="Eco Champion",
-        icon="🏆",
-        unlocked=points >= 500,
-        requirement=500
-    )
+prof.lap("Badges")
 
 # -----------------------------
 # POINTS HISTORY CHART
 # -----------------------------
 st.markdown("### 📈 Carbon Points History")
 
-user_transactions = [
-    t for t in transactions if t.get("user") == USER_ID
-]
+user_transactions = db.user_transactions(conn, USER_ID)
 
 if len(user_transactions) == 0:
     st.info("No activity yet. Upload waste images to start earning points!")
@@ -263,4 +231,4 @@ else:
         display_df,
         use_container_width=True
     )
-
+prof.lap("History chart")
@@ -1,10 +1,12 @@
 import streamlit as st
-import json
 import os
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 import pandas as pd
 os.makedirs("data", exist_ok=True)
 import openai
+import uuid
+
+from ecoverse import db, emissions, forecast, ledger, llm_cache, metrics, profiling, streaks, workers
 
 openai.api_key = st.secrets["OPENAI_API_KEY"]
 
@@ -17,6 +19,8 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 USER = st.session_state.get("user", "demo_user")
+metrics.page_view("Carbon Tracker", st.session_state)
+prof = profiling.timer("Carbon Tracker")
 
 # ===============================
 # PAGE HEADER
@@ -25,70 +29,24 @@ st.header("🌱 Carbon Footprint Tracker")
 st.caption("Log daily activities, track emissions, earn EcoPoints.")
 
 # ===============================
-# FILE PATHS
-# ===============================
-DATA_DIR = "data"
-CARBON_FILE = f"{DATA_DIR}/carbon_records.json"
-USERS_FILE = f"{DATA_DIR}/users.json"
-TXN_FILE = f"{DATA_DIR}/transactions.json"
-BADGE_FILE = f"{DATA_DIR}/badges.json"
-
-os.makedirs(DATA_DIR, exist_ok=True)
-
-# ===============================
-# HELPERS
+# DATA
 # ===============================
-def load_json(path, default):
-    if not os.path.exists(path):
-        return default
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return default
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-
-carbon_data = load_json(CARBON_FILE, [])
-users = load_json(USERS_FILE, {})
-transactions = load_json(TXN_FILE, [])
-badges = load_json(BADGE_FILE, {})
+conn = db.get_conn()
+prof.lap("Data load")
 
-users.setdefault(USER, {"name": USER, "points": 0})
-badges.setdefault(USER, [])
 
+AI_TIMEOUT_SECONDS = 20
 
-def predict_future_emissions(records, days=7):
-    """
-    Predict future CO2 emissions using moving average.
-    Simple, explainable, no ML training.
-    """
-    if len(records) < 3:
-        return None
 
-    # Take last 7 days (or fewer if not available)
-    recent = records[-7:]
-
-    values = []
-    for r in recent:
-        if "co2_total" in r:
-            values.append(r["co2_total"])
-
-    if not values:
-        return None
-
-    avg = sum(values) / len(values)
-
-    predictions = []
-    for i in range(days):
-        # small upward trend (2% per day)
-        predicted = round(avg * (1 + i * 0.02), 2)
-        predictions.append(predicted)
-
-    return predictions
+def chat_completion(model, prompt, temperature, max_tokens):
+    response = openai.ChatCompletion.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        request_timeout=AI_TIMEOUT_SECONDS
+    )
+    return response["choices"][0]["message"]["content"]
 
 #=========================
 #AI RECOMMENDATION FUNCTION
@@ -116,93 +74,54 @@ Give:
 Keep it simple, student-friendly, and actionable.
 """
 
+    # The prompt only depends on the rounded average, so repeat views and
+    # users with the same average share one cached completion.
     try:
-response = openai.ChatCompletion.create(
-    model="gpt-3.5-turbo",
-    messages=[{"role": "user", "content": prompt}],
-    temperature=0.6,
-    max_tokens=200
-)
-
-return response["choices"][0]["message"]["content"]
+        return llm_cache.cached_completion(
+            "gpt-3.5-turbo", prompt, chat_completion,
+            temperature=0.6, max_tokens=200
+        )
 
     except Exception:
         return "⚠️ AI service temporarily unavailable. Please try again later."
 
 
 
-# ====================================
-# 🔮 AI CARBON PREDICTION FUNCTION
-# ====================================
-def predict_future_carbon(user_records):
-    if len(user_records) < 3:
-        return "Not enough data to predict future emissions. Log at least 3 days of activity."
-
-    recent = user_records[-7:]  # last 7 days
-    avg_co2 = sum(r["co2"] for r in recent) / len(recent)
-
-    prompt = f"""
-You are an environmental data analyst AI.
-
-User's recent daily CO2 emissions (kg):
-{[r['co2'] for r in recent]}
-
-Average: {avg_co2:.2f} kg/day
-
-Predict:
-1. Expected average daily CO2 for next 7 days
-2. Whether emissions are increasing, stable, or decreasing
-3. One early warning or encouragement message
-"""
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4,
-        max_tokens=180
-    )
-
-    return response.choices[0].message.content
-
-# ===============================
-# EMISSION FACTORS (Demo)
-# ===============================
-FACTORS = {
-    "Car": 0.21,
-    "Bus": 0.10,
-    "Train": 0.04,
-    "Bike": 0.0,
-    "Walk": 0.0,
-    "Electricity": 0.85
-}
-
 # ===============================
 # DAILY INPUT FORM
 # ===============================
 st.subheader("📅 Log Today’s Carbon Activity")
 
+# One nonce per rendered form, carried in the submit button's key and in
+# the entry's idempotency key. It is replaced only after a successful
+# write, so a second click on the same form replays it and is dropped.
+if "carbon_form_nonce" not in st.session_state:
+    st.session_state.carbon_form_nonce = uuid.uuid4().hex
+form_nonce = st.session_state.carbon_form_nonce
+
 with st.form("carbon_form"):
     c1, c2 = st.columns(2)
 
     with c1:
-        mode = st.selectbox("Travel Mode", list(FACTORS.keys())[:-1])
+        mode = st.selectbox("Travel Mode", emissions.TRAVEL_MODES)
         km = st.number_input("Distance (km)", min_value=0.0, step=0.5)
 
     with c2:
         electricity = st.number_input("Electricity (kWh)", min_value=0.0, step=0.1)
         lifestyle = st.slider("Lifestyle Impact", 0.0, 1.0, 0.3)
 
-    submit = st.form_submit_button("✅ Save Entry")
+    submit = st.form_submit_button("✅ Save Entry", key=f"carbon_save_{form_nonce}")
 
 # ===============================
 # PROCESS ENTRY
 # ===============================
 if submit:
-    travel_co2 = km * FACTORS[mode]
-    electricity_co2 = electricity * FACTORS["Electricity"]
-    lifestyle_co2 = lifestyle * 2.0
-
-    total_co2 = round(travel_co2 + electricity_co2 + lifestyle_co2, 2)
+    # ===============================
+    # EMISSIONS & ECOPOINTS ENGINE
+    # ===============================
+    result = emissions.compute_one(mode, km, electricity, lifestyle)
+    total_co2 = result["co2"]
+    points = result["points"]
 
     entry = {
         "user": USER,
@@ -212,28 +131,28 @@ if submit:
         "co2": total_co2
     }
 
-    carbon_data.append(entry)
-    save_json(CARBON_FILE, carbon_data)
-
-    # ===============================
-    # ECOPOINTS ENGINE
-    # ===============================
-    points = max(0, int(50 - total_co2 * 5))
-    users[USER]["points"] += points
-
-    transactions.append({
-        "user": USER,
-        "type": "carbon_entry",
-        "co2": total_co2,
-        "points": points,
-        "timestamp": datetime.now().isoformat()
-    })
-
-    save_json(USERS_FILE, users)
-    save_json(TXN_FILE, transactions)
+    with db.transaction(conn):
+        saved = db.claim(conn, f"carbon_entry:{USER}:{form_nonce}")
+        if saved:
+            db.insert_carbon_record(conn, entry)
+            streaks.record_activity(conn, USER, date.today())
+            txn_id = db.insert_transaction(conn, {
+                "user": USER,
+                "type": "carbon_entry",
+                "co2": total_co2,
+                "points": points,
+                "timestamp": datetime.now().isoformat()
+            })
+            ledger.credit(conn, USER, points, txn_id)
+
+    if saved:
+        st.session_state.carbon_form_nonce = uuid.uuid4().hex
+        st.success(f"Saved! CO₂: {total_co2} kg | Points: +{points}")
+        st.rerun()
+    else:
+        st.info("This entry was already saved.")
 
-    st.success(f"Saved! CO₂: {total_co2} kg | Points: +{points}")
-    st.rerun()
+prof.lap("Form processing")
 
 # ===============================
 # HISTORY & CHART
@@ -241,48 +160,41 @@ if submit:
 st.markdown("---")
 st.subheader("📊 Your Carbon History")
 
-user_records = [r for r in carbon_data if r["user"] == USER]
+user_records = db.user_carbon_records(conn, USER)
+
+# Start the AI request now so it runs while the rest of the page renders
+ai_jobs = {}
+if user_records:
+    ai_jobs = {
+        workers.submit(get_ai_sustainability_advice, user_records): "advice",
+    }
 
 if user_records:
     df = pd.DataFrame(user_records)
     df["date"] = pd.to_datetime(df["date"])
     st.line_chart(df.set_index("date")["co2"])
 
+prof.lap("History chart")
+
 # ===============================
 # STREAKS & BADGES
 # ===============================
 st.markdown("---")
 st.subheader("🏆 Green Streaks & Badges")
 
-today = date.today()
-dates = sorted({date.fromisoformat(r["date"]) for r in user_records})
-streak = 0
-
-for i in range(len(dates)-1, -1, -1):
-    if dates[i] == today - timedelta(days=streak):
-        streak += 1
-    else:
-        break
+# Streak state and badges are updated when an entry is saved; this only reads
+streak = streaks.current(conn, USER)
 
 st.metric("Current Green Streak", f"{streak} day(s)")
 
-# Award badges
-def award_badge(name):
-    if name not in badges[USER]:
-        badges[USER].append(name)
-
-if streak >= 3:
-    award_badge("🌿 3-Day Green Streak")
-if streak >= 7:
-    award_badge("🔥 7-Day Eco Champion")
-
-save_json(BADGE_FILE, badges)
-
-if badges[USER]:
+user_badges = db.user_badges(conn, USER)
+if user_badges:
     st.write("Your badges:")
-    for b in badges[USER]:
+    for b in user_badges:
         st.success(b)
 
+prof.lap("Streaks & badges")
+
 # ===============================
 # AI RECOMMENDATIONS (RULE-BASED)
 # ===============================
@@ -292,13 +204,12 @@ if badges[USER]:
 st.markdown("---")
 st.subheader("🤖 AI Sustainability Assistant")
 
-if user_records:
-    with st.spinner("Analyzing your carbon footprint with AI..."):
-        advice = get_ai_sustainability_advice(user_records)
+advice_slot = st.empty()
 
-    st.success(advice)
+if user_records:
+    advice_slot.info("⏳ Analyzing your carbon footprint with AI...")
 else:
-    st.info("Log some carbon data to unlock AI-powered insights 🌱")
+    advice_slot.info("Log some carbon data to unlock AI-powered insights 🌱")
 
 # ====================================
 # 🔮 CARBON PREDICTION (FUTURE)
@@ -306,15 +217,39 @@ else:
 st.markdown("---")
 st.subheader("🔮 Carbon Emission Forecast")
 
-if user_records:
-    with st.spinner("Predicting your future carbon emissions..."):
-        prediction = predict_future_carbon(user_records)
+prediction = forecast.forecast(user_records)
+
+if prediction:
+    TREND_ICONS = {"increasing": "📈", "stable": "➖", "decreasing": "📉"}
+
+    c1, c2 = st.columns(2)
+    c1.metric("Expected daily CO₂ (next 7 days)", f"{prediction['average']} kg")
+    c2.metric(
+        "Trend",
+        f"{TREND_ICONS[prediction['trend']]} {prediction['trend'].capitalize()}",
+        f"{prediction['slope']:+} kg/day",
+        delta_color="inverse"
+    )
 
-    st.info(prediction)
+    forecast_df = pd.DataFrame({
+        "date": pd.to_datetime(prediction["dates"]),
+        "forecast_co2": prediction["co2"],
+    })
+    st.line_chart(forecast_df.set_index("date")["forecast_co2"])
+elif user_records:
+    st.info("Not enough data to predict future emissions. Log at least 3 days of activity.")
 else:
     st.info("Log some carbon data to enable future emission prediction 📈")
 
-# 
+prof.lap("Forecast")
+
+# Fill the advice placeholder when the request finishes
+for name, result, error in workers.as_finished(ai_jobs, AI_TIMEOUT_SECONDS):
+    if error is None:
+        advice_slot.success(result)
+    else:
+        advice_slot.warning("⚠️ AI service temporarily unavailable. Please try again later.")
+prof.lap("AI assistant")
 
 
 # ===============================
@@ -1,9 +1,11 @@
 import streamlit as st
-import json
 import os
+import uuid
 from datetime import datetime
 os.makedirs("data", exist_ok=True)
 
+from ecoverse import badges, db, leaderboard, metrics, profiling, rewards
+
 # ===============================
 # 🔐 ACCESS CONTROL
 # ===============================
@@ -13,46 +15,28 @@ if not st.session_state.get("logged_in"):
 
 USER_ID = st.session_state.get("user", "demo_user")
 
-# ===============================
-# 📂 FILE PATHS
-# ===============================
-USERS_FILE = "data/users.json"
-REWARDS_FILE = "data/rewards.json"
-TRANSACTIONS_FILE = "data/transactions.json"
-
-os.makedirs("data", exist_ok=True)
-
-# ===============================
-# 🧰 HELPERS
-# ===============================
-def load_json(path, default):
-    if not os.path.exists(path):
-        return default
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return default
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
 # ===============================
 # 📥 LOAD DATA
 # ===============================
-users = load_json(USERS_FILE, {})
-rewards = load_json(REWARDS_FILE, [])
-transactions = load_json(TRANSACTIONS_FILE, [])
+metrics.page_view("Rewards", st.session_state)
+prof = profiling.timer("Rewards")
+conn = db.get_conn()
+catalog = rewards.catalog(conn)
+stock = rewards.stock(conn)
+
+user_points = db.get_user(conn, USER_ID)["points"]
+board = leaderboard.get(conn)
+user_rank = board.rank(USER_ID)
 
-users.setdefault(USER_ID, {"name": USER_ID, "points": 0})
-user_points = users[USER_ID]["points"]
+prof.lap("Data load")
 
 # ===============================
 # 🏆 PAGE HEADER
 # ===============================
 st.title("🎁 Rewards & Redemption")
 st.write(f"### 🌱 Your Current EcoPoints: **{user_points}**")
+if user_rank is not None:
+    st.caption(f"🏆 Campus rank: #{user_rank} of {len(board)}")
 
 st.markdown("---")
 
@@ -87,14 +71,10 @@ st.markdown("""
 
 st.subheader("🏅 Your Badges")
 
-BADGES = [
-    ("🌱 Green Starter", 100),
-    ("🌿 Eco Warrior", 300),
-    ("🌳 Sustainability Champion", 500),
-]
+earned = set(db.user_badges(conn, USER_ID))
 
-for name, threshold in BADGES:
-    if user_points >= threshold:
+for name, threshold in badges.get_rules().rules("points"):
+    if name in earned:
         st.markdown(f'<div class="badge">✅ {name}</div>', unsafe_allow_html=True)
     else:
         st.markdown(
@@ -104,15 +84,18 @@ for name, threshold in BADGES:
 
 st.markdown("---")
 
+prof.lap("Badges")
+
 # ===============================
 # 🎁 PART 2 — Rewards Catalog
 # ===============================
 st.subheader("🛍️ Available Rewards")
 
-if not rewards:
+if not catalog:
     st.info("No rewards available yet.")
 else:
-    for reward in rewards:
+    for reward in catalog:
+        remaining = stock.get(reward["id"])
         with st.container(border=True):
             col1, col2 = st.columns([3, 1])
 
@@ -124,39 +107,58 @@ else:
                 if reward.get("description"):
                     st.caption(reward["description"])
 
+                if remaining is not None:
+                    st.write(f"**In Stock:** {remaining}")
+
                 if reward.get("approved"):
                     st.success("✅ Auto-approved reward")
                 else:
                     st.warning("⏳ Requires admin approval")
 
             with col2:
-                if user_points >= reward["points_required"]:
+                if remaining == 0:
+                    st.button(
+                        "Out of stock",
+                        disabled=True,
+                        key=f"sold_out_{reward['id']}",
+                        use_container_width=True
+                    )
+                elif user_points >= reward["points_required"]:
+                    # One nonce per rendered button, in its widget key and the
+                    # redemption's idempotency key; replaced only once a
+                    # redemption succeeds, so a double click replays it
+                    nonce_name = f"redeem_nonce_{reward['id']}"
+                    if nonce_name not in st.session_state:
+                        st.session_state[nonce_name] = uuid.uuid4().hex
+                    nonce = st.session_state[nonce_name]
+
                     if st.button(
                         "Redeem",
-                        key=f"redeem_{reward['id']}",
+                        key=f"redeem_{reward['id']}_{nonce}",
                         use_container_width=True
                     ):
-                        # Deduct points
-                        users[USER_ID]["points"] -= reward["points_required"]
-
-                        # Log transaction
-                        transactions.append({
-                            "user": USER_ID,
-                            "reward": reward["name"],
-                            "points_spent": reward["points_required"],
-                            "timestamp": datetime.now().isoformat(),
-                            "status": "approved" if reward.get("approved") else "pending"
-                        })
-
-                        save_json(USERS_FILE, users)
-                        save_json(TRANSACTIONS_FILE, transactions)
-
-                        if reward.get("approved"):
-                            st.success("🎉 Reward redeemed successfully!")
+                        # Balance, stock, transaction and debit in one write
+                        with db.transaction(conn):
+                            outcome = rewards.redeem(
+                                conn, USER_ID, reward,
+                                f"{USER_ID}:{reward['id']}:{nonce}",
+                                datetime.now().isoformat()
+                            )
+
+                        if outcome == rewards.DUPLICATE:
+                            st.info("This redemption was already recorded.")
+                        elif outcome == rewards.INSUFFICIENT_POINTS:
+                            st.error("Not enough points for this reward.")
+                        elif outcome == rewards.OUT_OF_STOCK:
+                            st.error("Sorry, this reward just ran out of stock.")
                         else:
-                            st.info("🛂 Redemption pending admin approval")
+                            st.session_state[nonce_name] = uuid.uuid4().hex
+                            if reward.get("approved"):
+                                st.success("🎉 Reward redeemed successfully!")
+                            else:
+                                st.info("🛂 Redemption pending admin approval")
 
-                        st.rerun()
+                            st.rerun()
                 else:
                     st.button(
                         "Not enough points",
@@ -167,15 +169,14 @@ else:
 
 st.markdown("---")
 
+prof.lap("Catalog & redemption")
+
 # ===============================
 # 📜 PART 3 — Redemption History
 # ===============================
 st.subheader("📜 Redemption History")
 
-history = [
-    t for t in transactions
-    if t.get("user") == USER_ID
-]
+history = db.user_transactions(conn, USER_ID, "redemption")
 
 if history:
     for h in reversed(history):
@@ -188,6 +189,8 @@ if history:
 else:
     st.info("No redemptions yet.")
 
+prof.lap("Redemption history")
+
 st.markdown("---")
 st.caption("EcoPoints are earned via Carbon Tracker and sustainability actions.")
 
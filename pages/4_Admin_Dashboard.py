@@ -1,9 +1,13 @@
 import streamlit as st
-import json
 import os
+import shlex
+import tempfile
+from datetime import timedelta
 import pandas as pd
 os.makedirs("data", exist_ok=True)
 
+from ecoverse import bulk_import, db, export, forecast, leaderboard, metrics, profiling, rewards, rollups
+
 # ==============================
 # STEP 6.3 — Admin-only access
 # ==============================
@@ -18,29 +22,14 @@ if st.session_state.get("role") != "admin":
 
 
 
-USERS_FILE = "data/users.json"
-TRANSACTIONS_FILE = "data/transactions.json"
-REWARDS_FILE = "data/rewards.json"
-
-# -----------------------------
-# Helper functions
-# -----------------------------
-def load_json(path, default):
-    if not os.path.exists(path):
-        return default
-    with open(path, "r") as f:
-        return json.load(f)
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
 # -----------------------------
 # Load data
 # -----------------------------
-users = load_json(USERS_FILE, {})
-transactions = load_json(TRANSACTIONS_FILE, [])
-rewards = load_json(REWARDS_FILE, [])
+metrics.page_view("Admin Dashboard", st.session_state)
+prof = profiling.timer("Admin Dashboard")
+conn = db.get_conn()
+board = leaderboard.get(conn)
+prof.lap("Data load")
 
 # -----------------------------
 # UI
@@ -54,9 +43,9 @@ st.markdown("---")
 # =============================
 st.header("📊 Campus Sustainability Metrics")
 
-total_points = sum(user["points"] for user in users.values())
-total_users = len(users)
-total_transactions = len(transactions)
+total_points = db.total_points(conn)
+total_users = len(board)
+total_transactions = db.count_transactions(conn)
 
 st.metric("Total Users", total_users)
 st.metric("Total Carbon Points Issued", total_points)
@@ -67,95 +56,180 @@ st.markdown("---")
 # Chart 1: Points by User
 # =========================
 st.subheader("📊 Carbon Points Distribution")
+st.caption("Top 20 users")
 
-if users:
+if total_users:
     points_df = pd.DataFrame([
-        {"User": user_data["name"], "Points": user_data["points"]}
-        for user_data in users.values()
+        {"User": entry["name"], "Points": entry["points"]}
+        for entry in board.top(20)
     ])
 
     st.bar_chart(points_df.set_index("User"))
 else:
     st.info("No user data available for chart.")
 
+prof.lap("Metrics")
+
 # =============================
 # SECTION 2: Leaderboard
 # =============================
 st.header("🏆 Leaderboard")
 
-sorted_users = sorted(
-    users.items(),
-    key=lambda x: x[1]["points"],
-    reverse=True
-)
-
-for rank, (user_id, user_data) in enumerate(sorted_users, start=1):
-    st.write(f"{rank}. **{user_data['name']}** — {user_data['points']} points")
+LEADERBOARD_PAGE_SIZE = 25
+
+if total_users:
+    page_count = (total_users - 1) // LEADERBOARD_PAGE_SIZE + 1
+    page = st.number_input(
+        f"Page (of {page_count})", min_value=1, max_value=page_count, value=1,
+        key="leaderboard_page"
+    )
+    entries = board.top(LEADERBOARD_PAGE_SIZE, (page - 1) * LEADERBOARD_PAGE_SIZE)
+
+    st.dataframe(
+        pd.DataFrame(entries)[["rank", "name", "points"]],
+        hide_index=True,
+        use_container_width=True
+    )
+else:
+    st.info("No users yet.")
 
 st.markdown("---")
+prof.lap("Leaderboard")
+
 # =========================
 # Chart 2: Transactions Over Time
 # =========================
 st.subheader("🕒 Transactions Over Time")
 
-if transactions:
-    txn_df = pd.DataFrame(transactions)
-
-    txn_df["timestamp"] = pd.to_datetime(txn_df["timestamp"])
-    txn_df["date"] = txn_df["timestamp"].dt.date
+daily_txns = rollups.daily_counts(conn)
 
-    daily_txns = txn_df.groupby("date").size()
+if daily_txns:
+    daily_df = pd.DataFrame(daily_txns, columns=["date", "transactions"])
+    daily_df["date"] = pd.to_datetime(daily_df["date"])
 
-    st.line_chart(daily_txns)
+    st.line_chart(daily_df.set_index("date")["transactions"])
 else:
     st.info("No transactions available.")
 
+prof.lap("Transactions chart")
+
+# =========================
+# Campus Emission Outlook
+# =========================
+st.markdown("---")
+st.subheader("🔮 Campus Emission Outlook (next 7 days)")
+
+# Shared by every admin session; refitted at most every few minutes
+outlook = forecast.campus_outlook(conn)
+
+if outlook:
+    trends = pd.Series([f["trend"] for f in outlook.values()]).value_counts()
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("📈 Increasing", int(trends.get("increasing", 0)))
+    c2.metric("➖ Stable", int(trends.get("stable", 0)))
+    c3.metric("📉 Decreasing", int(trends.get("decreasing", 0)))
+
+    st.metric(
+        "Expected campus CO₂ per day",
+        f"{sum(f['average'] for f in outlook.values()):.1f} kg"
+    )
+else:
+    st.info("Not enough recent carbon data for a campus forecast.")
+
+prof.lap("Forecast")
+
 # =============================
 # SECTION 3: Pending Reward Approvals
 # =============================
 st.header("⏳ Pending Reward Approvals")
 
-pending = [
-    t for t in transactions
-    if t.get("status") == "pending"
-]
+pending_total = dict(rollups.status_counts(conn)).get("pending", 0)
 
-if not pending:
+if not pending_total:
 	st.success("No pending approvals.")
 else:
-    for idx, txn in enumerate(pending):
-        st.markdown("### 🎁 Reward Request")
-        st.write(f"👤 User: **{txn['user']}**")
-        st.write(f"🏆 Reward: **{txn['reward']}**")
-        st.write(f"💰 Points Spent: **{txn['points_spent']}**")
-        st.write(f"🕒 Time: {txn['timestamp']}")
-
-        col1, col2 = st.columns(2)
-
-        # ---------- APPROVE ----------
-        with col1:
-            if st.button("✅ Approve", key=f"approve_{idx}"):
-                txn["status"] = "approved"
-                save_json(TRANSACTIONS_FILE, transactions)
-                st.success("Reward approved successfully!")
-                st.rerun()
-
-        # ---------- REJECT ----------
-        with col2:
-            if st.button("❌ Reject", key=f"reject_{idx}"):
-                txn["status"] = "rejected"
-
-                # Refund points
-                user_id = txn["user"]
-                if user_id in users:
-                    users[user_id]["points"] += txn["points_spent"]
-                    save_json(USERS_FILE, users)
-
-                save_json(TRANSACTIONS_FILE, transactions)
-                st.warning("Reward rejected and points refunded.")
-                st.rerun()
-
-        st.markdown("---")
+    st.caption(f"{pending_total} request(s) waiting, oldest first.")
+
+    q1, q2 = st.columns(2)
+    with q1:
+        queue_size = st.selectbox("Requests per batch", [50, 100, 250, 500, 1000])
+    with q2:
+        select_all = st.checkbox("Select all in batch")
+
+    queue = db.pending_queue(conn, limit=queue_size)
+    queue_df = pd.DataFrame(queue)[["id", "user", "reward", "points_spent", "timestamp"]]
+    queue_df.insert(0, "select", select_all)
+
+    # Keyed by the batch's ids so ticks never carry over to other requests
+    edited = st.data_editor(
+        queue_df,
+        key=f"pending_{queue[0]['id']}_{queue[-1]['id']}_{len(queue)}_{select_all}",
+        disabled=["id", "user", "reward", "points_spent", "timestamp"],
+        hide_index=True,
+        use_container_width=True,
+    )
+    selected = edited.loc[edited["select"], "id"].tolist()
+
+    col1, col2 = st.columns(2)
+
+    # Only still-pending requests change, so the first decision on each is
+    # final; a whole batch, refunds included, commits as one write
+    with col1:
+        if st.button(f"✅ Approve selected ({len(selected)})", disabled=not selected):
+            with db.transaction(conn):
+                done = rewards.review(conn, selected, approve=True)
+            st.success(f"Approved {len(done)} request(s).")
+            if len(done) < len(selected):
+                st.info(f"{len(selected) - len(done)} were already handled.")
+            st.rerun()
+
+    with col2:
+        if st.button(f"❌ Reject selected ({len(selected)})", disabled=not selected):
+            with db.transaction(conn):
+                done = rewards.review(conn, selected, approve=False)
+            st.warning(f"Rejected {len(done)} request(s) and refunded their points.")
+            if len(done) < len(selected):
+                st.info(f"{len(selected) - len(done)} were already handled.")
+            st.rerun()
+
+prof.lap("Approvals")
+
+# =============================
+# Reward Stock
+# =============================
+st.header("📦 Reward Stock")
+
+catalog = rewards.catalog(conn)
+if not catalog:
+    st.info("No rewards in the catalog.")
+else:
+    stock = rewards.stock(conn)
+    st.dataframe(
+        pd.DataFrame([{
+            "reward": r["name"],
+            "points": r["points_required"],
+            "stock": stock.get(r["id"]),
+        } for r in catalog]),
+        column_config={
+            "stock": st.column_config.NumberColumn("stock", help="Blank = unlimited"),
+        },
+        use_container_width=True,
+    )
+
+    with st.form("reward_stock"):
+        picked = st.selectbox(
+            "Reward", catalog, format_func=lambda r: r["name"]
+        )
+        limited = st.checkbox("Limit stock", value=True)
+        remaining = st.number_input("Units available", min_value=0, step=1)
+        if st.form_submit_button("Update stock"):
+            with db.transaction(conn):
+                rewards.set_stock(conn, picked["id"], remaining if limited else None)
+            st.success(f"Stock updated for {picked['name']}.")
+            st.rerun()
+
+prof.lap("Reward stock")
 
 # =========================
 # Chart 3: Reward Approval Status
@@ -163,22 +237,227 @@ else:
 st.markdown("---")
 st.subheader("🎁 Reward Approval Status")
 
-if transactions:
-    status_df = pd.DataFrame(transactions)
+status_counts = rollups.status_counts(conn)
 
-    if "status" in status_df.columns:
-        status_counts = status_df["status"].value_counts()
-        st.bar_chart(status_counts)
-    else:
-        st.info("No reward status data found.")
+if status_counts:
+    status_df = pd.DataFrame(status_counts, columns=["status", "count"])
+    st.bar_chart(status_df.set_index("status")["count"])
 else:
     st.info("No reward transactions yet.")
 
+prof.lap("Approval status chart")
+
+# =============================
+# Bulk Activity Import
+# =============================
+st.header("📥 Bulk Import Activity Logs")
+st.caption(
+    "CSV or JSONL with columns: user, date, km and/or electricity (kWh), "
+    "and optionally travel_mode, lifestyle (0-1)."
+)
+
+import_file = st.file_uploader(
+    "Activity export", type=["csv", "jsonl", "ndjson"], key="bulk_import_file"
+)
+
+if import_file is not None and st.button("🚀 Import", key="bulk_import_run"):
+    import_status = st.empty()
+
+    def show_progress(report):
+        import_status.info(
+            f"⏳ {report['rows']:,} rows processed "
+            f"({report['rows_per_second']:,.0f} rows/s)"
+        )
+
+    try:
+        report = bulk_import.import_activities(
+            conn, import_file, on_chunk=show_progress
+        )
+    except ValueError as exc:
+        import_status.error(f"❌ Could not read file: {exc}")
+    else:
+        import_status.success(
+            f"✅ Imported {report['imported']:,} of {report['rows']:,} rows "
+            f"in {report['seconds']:.1f}s ({report['rows_per_second']:,.0f} rows/s)"
+        )
+        if report["duplicates"]:
+            st.info(
+                f"{report['duplicates']:,} rows were already imported from "
+                "this file and were skipped"
+            )
+        if report["rejected"]:
+            st.warning(f"{report['rejected']:,} rows rejected")
+            st.dataframe(
+                pd.DataFrame(report["rejects"], columns=["row", "reason"]),
+                hide_index=True,
+                use_container_width=True
+            )
+
+st.markdown("---")
+
+prof.lap("Bulk import")
+
+# =============================
+# Data Export
+# =============================
+st.header("📤 Export Data")
+
+# The download button keeps the file in server memory for the session,
+# so browser downloads are capped; larger exports go through the CLI
+EXPORT_DOWNLOAD_MAX_ROWS = 500_000
+st.caption(
+    f"Browser downloads are limited to {EXPORT_DOWNLOAD_MAX_ROWS:,} rows. "
+    "For larger exports run `python -m ecoverse.export` on the server."
+)
+
+e1, e2, e3, e4 = st.columns(4)
+with e1:
+    export_table = st.selectbox("Table", list(export.TABLES), key="export_table")
+with e2:
+    export_fmt = st.selectbox("Format", ["csv", "parquet"], key="export_fmt")
+with e3:
+    export_user = st.text_input("User (optional)", key="export_user").strip() or None
+with e4:
+    export_dates = st.date_input("Date range (optional)", value=(), key="export_dates")
+
+if st.button("📦 Prepare export", key="export_run"):
+    export_filters = {"user": export_user, "since": None, "until": None}
+    if len(export_dates) == 2:
+        export_filters["since"] = export_dates[0].isoformat()
+        export_filters["until"] = (export_dates[1] + timedelta(days=1)).isoformat()
+
+    # Stream to a temp file in chunks, stopping one row past the cap,
+    # then hand the file to the browser
+    fd, export_path = tempfile.mkstemp(suffix=f".{export_fmt}")
+    os.close(fd)
+    try:
+        with st.spinner("Exporting..."):
+            exported = export.export(
+                conn, export_table, export_path, fmt=export_fmt,
+                limit=EXPORT_DOWNLOAD_MAX_ROWS + 1, **export_filters
+            )
+        if exported > EXPORT_DOWNLOAD_MAX_ROWS:
+            command = ["python", "-m", "ecoverse.export",
+                       export_table, f"{export_table}.{export_fmt}"]
+            for flag, value in export_filters.items():
+                if value is not None:
+                    command += [f"--{flag}", value]
+            st.warning(
+                f"More than {EXPORT_DOWNLOAD_MAX_ROWS:,} rows — too large to "
+                "download here. Run this on the server instead:"
+            )
+            st.code(shlex.join(command), language="bash")
+        else:
+            with open(export_path, "rb") as f:
+                st.download_button(
+                    f"⬇️ Download {exported:,} rows",
+                    data=f,
+                    file_name=f"{export_table}.{export_fmt}",
+                    key="export_download"
+                )
+    except RuntimeError as exc:
+        st.error(str(exc))
+    finally:
+        os.remove(export_path)
+
+st.markdown("---")
+
+prof.lap("Export")
+
 # =============================
 # SECTION 4: Audit Log
 # =============================
 st.header("📜 Full Transaction Audit Log")
 
-for txn in transactions[::-1]:
-    st.write(txn)
+AUDIT_PAGE_SIZE = 50
+TXN_TYPES = ["All", "waste_upload", "carbon_entry", "redemption"]
+TXN_STATUSES = ["All", "pending", "approved", "rejected"]
+
+f1, f2, f3, f4 = st.columns(4)
+with f1:
+    audit_user = st.text_input("User", key="audit_user").strip() or None
+with f2:
+    audit_type = st.selectbox("Type", TXN_TYPES, key="audit_type")
+with f3:
+    audit_status = st.selectbox("Status", TXN_STATUSES, key="audit_status")
+with f4:
+    audit_dates = st.date_input("Date range", value=(), key="audit_dates")
+
+audit_filters = {
+    "user": audit_user,
+    "txn_type": None if audit_type == "All" else audit_type,
+    "status": None if audit_status == "All" else audit_status,
+    "since": None,
+    "until": None,
+}
+if len(audit_dates) == 2:
+    audit_filters["since"] = audit_dates[0].isoformat()
+    audit_filters["until"] = (audit_dates[1] + timedelta(days=1)).isoformat()
+
+# Cursor stack: the (timestamp, id) each visited page starts before,
+# reset when filters change
+if st.session_state.get("audit_filters") != audit_filters:
+    st.session_state.audit_filters = audit_filters
+    st.session_state.audit_cursors = [None]
+
+cursors = st.session_state.audit_cursors
+audit_page = db.transaction_page(
+    conn, **audit_filters, before=cursors[-1], limit=AUDIT_PAGE_SIZE
+)
+
+if audit_page:
+    st.dataframe(
+        pd.DataFrame(audit_page),
+        hide_index=True,
+        use_container_width=True
+    )
+else:
+    st.info("No transactions match these filters.")
+
+p1, p2, p3 = st.columns([1, 1, 4])
+with p1:
+    if st.button("⬅️ Newer", disabled=len(cursors) == 1, key="audit_newer"):
+        cursors.pop()
+        st.rerun()
+with p2:
+    if st.button(
+        "Older ➡️",
+        disabled=len(audit_page) < AUDIT_PAGE_SIZE,
+        key="audit_older"
+    ):
+        cursors.append((audit_page[-1]["timestamp"], audit_page[-1]["id"]))
+        st.rerun()
+with p3:
+    st.caption(f"Page {len(cursors)}")
+prof.lap("Audit log")
+
+# =============================
+# SECTION 5: Performance
+# =============================
+st.markdown("---")
+st.header("⏱️ Performance")
+
+# The switch is process-wide: every render shows its current state, and
+# only a click on this toggle (its on_change) changes it
+st.session_state.profiling_on = profiling.enabled()
+profiling_on = st.toggle(
+    "Record section timings (all pages, all sessions)",
+    key="profiling_on",
+    on_change=lambda: profiling.enable(st.session_state.profiling_on)
+)
+
+perf_rows = profiling.summary()
+if perf_rows:
+    st.dataframe(
+        pd.DataFrame(perf_rows).sort_values(["page", "p90_ms"], ascending=[True, False]),
+        hide_index=True,
+        use_container_width=True
+    )
+    if st.button("Reset timings", key="profiling_reset"):
+        profiling.reset()
+        st.rerun()
+elif profiling_on:
+    st.info("No timings yet — open some pages to collect them.")
+else:
+    st.caption("Timing is off; pages skip it entirely until it is turned on.")
 
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from ecoverse import db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh database with the full schema and no data."""
+    path = str(tmp_path / "ecoverse.db")
+    conn = db.connect(path)
+    db.create_schema(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def race(db_path):
+    """
+    race(fn, n) runs fn(conn) in n threads at once, each on its own
+    connection to db_path, and returns their results in thread order.
+    """
+    def run(fn, n=2):
+        barrier = threading.Barrier(n)
+        results, errors = [None] * n, []
+
+        def worker(i):
+            conn = db.connect(db_path)
+            try:
+                barrier.wait()
+                results[i] = fn(conn)
+            except BaseException as exc:
+                errors.append(exc)
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    return run
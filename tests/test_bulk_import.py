@@ -0,0 +1,130 @@
+import io
+
+import pandas as pd
+
+from ecoverse import bulk_import, db, ledger
+
+
+def _chunk(rows):
+    return pd.DataFrame(rows, dtype=str)
+
+
+def test_validate_rejection_reasons():
+    chunk = _chunk([
+        {"user": "alice", "date": "2026-03-01", "travel_mode": "Bus", "km": "12"},
+        {"user": "", "date": "2026-03-01", "km": "1"},
+        {"user": "bob", "date": "yesterday", "km": "1"},
+        {"user": "bob", "date": "2026-03-01", "travel_mode": "Rocket", "km": "1"},
+        {"user": "bob", "date": "2026-03-01", "km": "far"},
+        {"user": "bob", "date": "2026-03-01", "km": "-3"},
+        {"user": "bob", "date": "2026-03-01", "km": "1", "lifestyle": "2"},
+        {"user": "bob", "date": "2026-03-01", "travel_mode": "Car"},
+        {"user": "bob", "date": "2026-03-01", "electricity": "4.5"},
+    ]).fillna("")
+
+    activities, rejects = bulk_import.validate(chunk)
+
+    assert rejects == [
+        (2, "missing user"),
+        (3, "invalid date"),
+        (4, "unknown travel_mode"),
+        (5, "invalid km"),
+        (6, "negative km"),
+        (7, "lifestyle must be between 0 and 1"),
+        (8, "no activity (km or electricity)"),
+    ]
+    assert (activities.index + 1).tolist() == [1, 9]
+    assert activities["km"].tolist() == [12.0, 0.0]
+    assert activities["travel_mode"].tolist() == ["Bus", "Walk"]
+
+
+def test_validate_missing_columns_rejects_every_row():
+    activities, rejects = bulk_import.validate(_chunk([{"user": "alice"}] * 2))
+    assert activities.empty
+    assert rejects == [(1, "missing user/date columns"), (2, "missing user/date columns")]
+
+
+def test_mixed_utc_offsets_keep_local_wall_time():
+    chunk = _chunk([
+        {"user": "alice", "date": "2026-03-28T23:30:00+01:00", "km": "1"},
+        {"user": "alice", "date": "2026-03-30T00:30:00+02:00", "km": "1"},
+        {"user": "alice", "date": "2026-03-30T08:00:00", "km": "1"},
+        {"user": "alice", "date": "2026-03-30T08:00:00Z", "km": "1"},
+        {"user": "alice", "date": "not a date", "km": "1"},
+    ])
+
+    activities, rejects = bulk_import.validate(chunk)
+
+    assert rejects == [(5, "invalid date")]
+    assert activities["date"].dt.tz is None
+    assert activities["date"].dt.strftime("%Y-%m-%d %H:%M").tolist() == [
+        "2026-03-28 23:30", "2026-03-30 00:30", "2026-03-30 08:00", "2026-03-30 08:00",
+    ]
+
+
+def test_uniform_offset_is_dropped_not_applied():
+    when = bulk_import.parse_dates(pd.Series(["2026-03-01T00:30:00+02:00"] * 2))
+    assert when.dt.tz is None
+    assert when.dt.strftime("%Y-%m-%d %H:%M").tolist() == ["2026-03-01 00:30"] * 2
+
+
+CSV = (
+    "user,date,travel_mode,km,electricity\n"
+    "alice,2026-03-28T09:00:00+01:00,Car,10,\n"
+    "bob,2026-03-30T09:00:00+02:00,Bus,5,2\n"
+    "carol,2026-03-30,,,\n"
+    "alice,2026-03-31,Walk,2,\n"
+)
+
+
+def _import(conn, text, name="activities.csv", chunk_rows=2):
+    source = io.BytesIO(text.encode())
+    source.name = name
+    return bulk_import.import_activities(conn, source, chunk_rows=chunk_rows)
+
+
+def test_import_with_mixed_offsets_rejects_nothing_but_empty_rows(db_path):
+    conn = db.connect(db_path)
+    report = _import(conn, CSV)
+    assert (report["rows"], report["imported"], report["rejected"]) == (4, 3, 1)
+    assert report["rejects"] == [(3, "no activity (km or electricity)")]
+
+
+def test_jsonl_with_mixed_offsets(db_path):
+    conn = db.connect(db_path)
+    text = (
+        '{"user": "alice", "date": "2026-03-28T09:00:00+01:00", "km": 3}\n'
+        '{"user": "alice", "date": "2026-03-30T09:00:00+02:00", "km": 4}\n'
+        '{"user": "alice", "date": "2026-03-30T09:00:00", "km": 5}\n'
+    )
+    report = _import(conn, text, name="activities.jsonl", chunk_rows=10)
+    assert (report["imported"], report["rejected"]) == (3, 0)
+
+
+def test_reimport_is_idempotent(db_path):
+    conn = db.connect(db_path)
+    first = _import(conn, CSV)
+    balances = {u: ledger.balance(conn, u) for u in ("alice", "bob")}
+    counts = [conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+              for t in ("carbon_records", "transactions", "ledger")]
+
+    again = _import(conn, CSV)
+
+    assert (first["imported"], first["duplicates"]) == (3, 0)
+    assert (again["imported"], again["duplicates"], again["rejected"]) == (0, 3, 1)
+    assert {u: ledger.balance(conn, u) for u in balances} == balances
+    assert [conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+            for t in ("carbon_records", "transactions", "ledger")] == counts
+
+
+def test_resumed_import_writes_only_missing_rows(db_path):
+    conn = db.connect(db_path)
+    source = io.BytesIO(CSV.encode())
+    key = bulk_import.file_digest(source)
+    activities, _ = bulk_import.validate(pd.read_csv(source, dtype=str, keep_default_na=False))
+    assert bulk_import.write_chunk(conn, activities.iloc[:1], key) == 1
+
+    report = _import(conn, CSV)
+
+    assert (report["imported"], report["duplicates"]) == (2, 1)
+    assert conn.execute("SELECT COUNT(*) FROM carbon_records").fetchone()[0] == 3
@@ -0,0 +1,106 @@
+import io
+
+from ecoverse import bulk_import, db, dedupe, ledger, metrics
+
+
+def test_wal_bytes_counted_once_under_concurrent_writers(db_path, race):
+    conn = db.connect(db_path)
+    conn.execute("CREATE TABLE blobs (data BLOB)")
+    label = (metrics.file_label(db_path),)
+    counted_before = metrics.SQLITE_WAL_BYTES._values.get(label, 0)
+    page_size, first_frame, _ = db.wal_index(db_path)
+
+    def write(c):
+        # No checkpoints, so the WAL only grows and its size is the truth
+        c.execute("PRAGMA wal_autocheckpoint=0")
+        for _ in range(50):
+            with db.transaction(c):
+                c.execute("INSERT INTO blobs VALUES (randomblob(3000))")
+
+    race(write, 8)
+
+    _, last_frame, _ = db.wal_index(db_path)
+    written = (last_frame - first_frame) * (page_size + db.WAL_FRAME_HEADER)
+    counted = metrics.SQLITE_WAL_BYTES._values.get(label, 0) - counted_before
+    assert counted == written
+
+
+def test_reset_demo_data_forgets_activity(db_path):
+    conn = db.connect(db_path)
+    csv = b"user,date,km\nalice,2026-03-01,3\nalice,2026-03-02,4\n"
+    assert bulk_import.import_activities(conn, io.BytesIO(csv))["imported"] == 2
+    with db.transaction(conn):
+        dedupe.record(conn, "f" * 64, 0x0F0F0F0F0F0F0F0F, 0x808080, "demo_user",
+                      "Organic Waste", 0.9)
+        conn.execute("INSERT INTO badges (user, badge) VALUES ('demo_user', 'Starter')")
+
+    db.reset_demo_data(conn)
+
+    assert dedupe.find_exact(conn, "f" * 64) is None
+    assert db.user_badges(conn, "demo_user") == []
+    assert conn.execute("SELECT COUNT(*) FROM streaks").fetchone()[0] == 0
+    assert [dict(r) for r in conn.execute("SELECT id, points FROM users")] == [
+        {"id": "demo_user", "points": 0}
+    ]
+
+    # The same file imports in full again, without duplicate records
+    assert bulk_import.import_activities(conn, io.BytesIO(csv))["imported"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM carbon_records").fetchone()[0] == 2
+    assert ledger.balance(conn, "alice") > 0
+
+
+def test_transaction_page_walks_an_index_in_page_order(db_path):
+    conn = db.connect(db_path)
+    plans = []
+    real_execute = conn.execute
+
+    class Tracing:
+        def execute(self, sql, params=()):
+            if sql.startswith("SELECT * FROM transactions"):
+                plans.append(" / ".join(
+                    r[3] for r in real_execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                ))
+            return real_execute(sql, params)
+
+    combos = [
+        dict(user=user, txn_type=txn_type, status=status)
+        for user in (None, "alice") for txn_type in (None, "carbon_entry")
+        for status in (None, "approved")
+    ]
+    for filters in combos:
+        for before in (None, ("2026-03-01T00:00:00", 5)):
+            db.transaction_page(Tracing(), since="2026-01-01", before=before, **filters)
+
+    assert len(plans) == 2 * len(combos)
+    for filters, plan in zip((f for f in combos for _ in range(2)), plans):
+        assert "TEMP B-TREE" not in plan, (filters, plan)
+        assert "USING INDEX" in plan, (filters, plan)
+        if filters["user"] is not None:
+            assert "idx_txn_user" in plan, (filters, plan)
+
+
+def test_transaction_page_keyset_paging_with_tied_timestamps(db_path):
+    conn = db.connect(db_path)
+    with db.transaction(conn):
+        db.insert_transactions(conn, (
+            {"user": "alice" if i % 2 else "bob",
+             "type": "carbon_entry" if i % 3 else "waste_upload",
+             "points": i, "timestamp": f"2026-03-0{i // 4 + 1}T08:00:00"}
+            for i in range(20)
+        ))
+
+    seen, before = [], None
+    while True:
+        page = db.transaction_page(conn, user="alice", txn_type="carbon_entry",
+                                   before=before, limit=3)
+        if not page:
+            break
+        seen += page
+        before = (page[-1]["timestamp"], page[-1]["id"])
+
+    expected = conn.execute(
+        "SELECT id FROM transactions WHERE user = 'alice' AND type = 'carbon_entry' "
+        "ORDER BY timestamp DESC, id DESC"
+    ).fetchall()
+    assert [r["id"] for r in seen] == [r[0] for r in expected]
+    assert len(seen) == 7
@@ -0,0 +1,41 @@
+import csv
+
+import pyarrow.parquet as pq
+
+from ecoverse import db, export
+
+
+def _records(conn, n):
+    with db.transaction(conn):
+        db.insert_carbon_records(conn, (
+            {"user": f"user{i % 3}", "date": f"2026-03-{i % 28 + 1:02d}",
+             "timestamp": f"2026-03-{i % 28 + 1:02d}T08:00:00",
+             "travel_mode": "Bus", "co2": float(i)}
+            for i in range(n)
+        ))
+
+
+def test_limit_stops_after_that_many_rows(db_path, tmp_path):
+    conn = db.connect(db_path)
+    _records(conn, 10)
+
+    path = str(tmp_path / "out.csv")
+    assert export.export(conn, "carbon_records", path, limit=4, user="user0") == 4
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["co2"] for r in rows] == ["0.0", "3.0", "6.0", "9.0"]
+
+    assert export.export(conn, "carbon_records", path, limit=100) == 10
+
+
+def test_parquet_export_in_chunks(db_path, tmp_path):
+    conn = db.connect(db_path)
+    _records(conn, 7)
+
+    path = str(tmp_path / "out.parquet")
+    assert export.export(
+        conn, "carbon_records", path, since="2026-03-03", chunk_rows=3
+    ) == 5
+    assert pq.ParquetFile(path).num_row_groups == 2
+    table = pq.read_table(path)
+    assert table.column("co2").to_pylist() == [2.0, 3.0, 4.0, 5.0, 6.0]
@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+from ecoverse import db, forecast
+
+TODAY = date(2026, 3, 20)
+
+
+def _log(conn, user, days_ago, co2):
+    day = (TODAY - timedelta(days=days_ago)).isoformat()
+    with db.transaction(conn):
+        db.insert_carbon_record(conn, {
+            "user": user, "date": day, "timestamp": f"{day}T08:00:00",
+            "travel_mode": "Car", "co2": co2,
+        })
+
+
+def test_campus_outlook_is_shared_until_the_data_moves(db_path, monkeypatch):
+    conn = db.connect(db_path)
+    for days_ago in range(5):
+        _log(conn, "alice", days_ago, 4.0)
+
+    outlook = forecast.campus_outlook(conn, TODAY)
+    assert set(outlook) == {"alice"}
+    assert forecast.campus_outlook(conn, TODAY) is outlook
+
+    # New logs are picked up only once the outlook is OUTLOOK_TTL old
+    for days_ago in range(5):
+        _log(conn, "bob", days_ago, 2.0)
+    assert forecast.campus_outlook(conn, TODAY) is outlook
+    monkeypatch.setattr(forecast, "OUTLOOK_TTL", 0)
+    assert set(forecast.campus_outlook(conn, TODAY)) == {"alice", "bob"}
+
+    # A new day or deleted records refit straight away
+    monkeypatch.setattr(forecast, "OUTLOOK_TTL", 3600)
+    assert forecast.campus_outlook(conn, TODAY + timedelta(days=40)) == {}
+    with db.transaction(conn):
+        conn.execute("DELETE FROM carbon_records WHERE user = 'bob'")
+    assert set(forecast.campus_outlook(conn, TODAY)) == {"alice"}
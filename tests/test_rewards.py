@@ -0,0 +1,118 @@
+from ecoverse import db, ledger, rewards
+
+NOW = "2026-01-01T00:00:00"
+
+
+def _reward(conn, name="Tote bag", cost=50, approved=True, stock=None):
+    with db.transaction(conn):
+        reward_id = conn.execute(
+            "INSERT INTO rewards (name, points_required, approved) VALUES (?, ?, ?)",
+            (name, cost, int(approved)),
+        ).lastrowid
+        if stock is not None:
+            rewards.set_stock(conn, reward_id, stock)
+    return next(r for r in rewards.catalog(conn) if r["id"] == reward_id)
+
+
+def _fund(conn, users, points):
+    with db.transaction(conn):
+        for user in users:
+            ledger.credit(conn, user, points)
+
+
+def test_last_unit_of_stock_goes_to_one_redeemer(db_path, race):
+    conn = db.connect(db_path)
+    reward = _reward(conn, stock=1)
+    users = [f"user{i}" for i in range(6)]
+    _fund(conn, users, 100)
+    turn = iter(users)
+
+    def redeem(c):
+        user = next(turn)
+        with db.transaction(c):
+            return user, rewards.redeem(c, user, reward, f"{user}:1", NOW)
+
+    results = race(redeem, len(users))
+    winners = [user for user, outcome in results if outcome == rewards.REDEEMED]
+    assert len(winners) == 1
+    assert [o for _, o in results].count(rewards.OUT_OF_STOCK) == len(users) - 1
+
+    assert rewards.stock(conn) == {reward["id"]: 0}
+    rows = conn.execute(
+        "SELECT user, reward_id FROM transactions WHERE type = 'redemption'"
+    ).fetchall()
+    assert [tuple(r) for r in rows] == [(winners[0], reward["id"])]
+    for user in users:
+        assert ledger.balance(conn, user) == (50 if user in winners else 100)
+
+
+def test_replayed_key_is_a_duplicate(db_path):
+    conn = db.connect(db_path)
+    reward = _reward(conn, stock=5)
+    _fund(conn, ["alice"], 100)
+
+    outcomes = []
+    for _ in range(2):
+        with db.transaction(conn):
+            outcomes.append(rewards.redeem(conn, "alice", reward, "alice:nonce", NOW))
+
+    assert outcomes == [rewards.REDEEMED, rewards.DUPLICATE]
+    assert rewards.stock(conn) == {reward["id"]: 4}
+    assert ledger.balance(conn, "alice") == 50
+
+
+def _pending_queue(conn, n):
+    reward = _reward(conn, name="Bike service", cost=10, approved=False, stock=n)
+    users = [f"user{i}" for i in range(n)]
+    _fund(conn, users, 10)
+    with db.transaction(conn):
+        for user in users:
+            assert rewards.redeem(conn, user, reward, user, NOW) == rewards.REDEEMED
+    ids = [r[0] for r in conn.execute(
+        "SELECT id FROM transactions WHERE status = 'pending' ORDER BY id"
+    )]
+    assert len(ids) == n
+    return reward, ids
+
+
+def test_bulk_approve_from_two_admins(db_path, race):
+    conn = db.connect(db_path)
+    _, ids = _pending_queue(conn, 20)
+
+    def approve(c):
+        with db.transaction(c):
+            return rewards.review(c, ids, approve=True)
+
+    first, second = race(approve, 2)
+    assert not set(first) & set(second)
+    assert sorted(first + second) == ids
+    statuses = conn.execute(
+        "SELECT status, COUNT(*) FROM transactions WHERE type = 'redemption' "
+        "GROUP BY status"
+    ).fetchall()
+    assert [tuple(r) for r in statuses] == [("approved", 20)]
+    assert conn.execute("SELECT COUNT(*) FROM ledger WHERE kind = 'refund'").fetchone()[0] == 0
+
+
+def test_bulk_approve_and_reject_decide_each_row_once(db_path, race):
+    conn = db.connect(db_path)
+    reward, ids = _pending_queue(conn, 20)
+    decisions = iter([True, False])
+
+    def review(c):
+        approve = next(decisions)
+        with db.transaction(c):
+            return approve, rewards.review(c, ids, approve=approve)
+
+    results = dict(race(review, 2))
+    approved, rejected = results[True], results[False]
+    assert sorted(approved + rejected) == ids
+
+    refunded = conn.execute(
+        "SELECT txn_id FROM ledger WHERE kind = 'refund' ORDER BY txn_id"
+    ).fetchall()
+    assert [r[0] for r in refunded] == sorted(rejected)
+    assert rewards.stock(conn) == {reward["id"]: len(rejected)}
+    for i, txn_id in enumerate(ids):
+        user = f"user{i}"
+        assert ledger.balance(conn, user) == (10 if txn_id in rejected else 0)